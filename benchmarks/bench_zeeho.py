@@ -0,0 +1,197 @@
+"""Offline benchmarks for the ZEEHO integration.
+
+Runs against ``StubZeehoServer`` on localhost, so no credentials or network
+access are needed. Requires the same environment the integration runs in
+(Home Assistant and aiohttp installed). Run from the repository root:
+
+    python -m benchmarks.bench_zeeho --vehicles 1,10,100,1000 > bench_output.txt
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks.stub_server import PAYLOAD_PATH, StubZeehoServer
+from custom_components.zeeho import ZeehoAccountCoordinator, ZeehoDataUpdateCoordinator
+from custom_components.zeeho.api import ZeehoApiError, ZeehoVehicleHomePageClient
+from custom_components.zeeho.const import ACCOUNTS, DOMAIN
+from custom_components.zeeho.position import PositionFilter
+from custom_components.zeeho.schema import PAYLOAD_PROJECTION
+from custom_components.zeeho import utils
+
+_LOGGER = logging.getLogger("benchmarks.zeeho")
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name, latencies, items_per_op=1, wall=None):
+    """Print throughput (items/s) and p50/p99 latency (ms) for one benchmark.
+
+    ``wall`` is the elapsed time for concurrent runs; sequential runs use the
+    sum of latencies.
+    """
+    total = wall if wall is not None else sum(latencies)
+    throughput = len(latencies) * items_per_op / total if total else float("inf")
+    print(
+        f"{name:<44} n={len(latencies):<6} "
+        f"throughput={throughput:>12.1f}/s "
+        f"p50={percentile(latencies, 0.5) * 1000:>9.3f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:>9.3f}ms"
+    )
+
+def make_client(session, base_url):
+    return ZeehoVehicleHomePageClient(
+        session, "Bearer bench", "bench-sign", "bench-app", "nonce", "signature", "okhttp/4.9.2",
+        base_url=base_url,
+    )
+
+async def bench_client(session, base_url, vehicles, iterations, concurrency, label=""):
+    """Round trips through ZeehoVehicleHomePageClient.async_get_data."""
+    client = make_client(session, base_url)
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.async_get_data()
+            except ZeehoApiError:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    report(f"client.get_data{label} vehicles={vehicles} c={concurrency}", latencies, wall=time.perf_counter() - start)
+
+def bench_decode(body, vehicles, iterations):
+    """vehicleHomePage body decode, whole payload vs. one selected vehicle."""
+    client = make_client(None, "")
+    for label, positions in (("all", None), ("select=1", {0})):
+        client.select(positions, PAYLOAD_PROJECTION)
+        latencies = []
+        for _ in range(iterations):
+            client._fingerprint = None
+            start = time.perf_counter()
+            client._parse(body, 0.0)
+            latencies.append(time.perf_counter() - start)
+        report(f"client decode {label} vehicles={vehicles}", latencies)
+
+def bench_process_data(vehicle_payload, iterations):
+    """ZeehoDataUpdateCoordinator.process_data on one recorded vehicle."""
+    coordinator = ZeehoDataUpdateCoordinator.__new__(ZeehoDataUpdateCoordinator)
+    coordinator.location_key = "bench"
+    coordinator.gps_conver = True
+    coordinator.position_filter = PositionFilter()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        coordinator.process_data(vehicle_payload)
+        latencies.append(time.perf_counter() - start)
+    report("coordinator.process_data", latencies)
+
+async def bench_coordinator(hass, session, base_url, vehicles, iterations, label=""):
+    """Full account refresh fanned out to ``vehicles`` vehicle coordinators."""
+    hass.data.setdefault(DOMAIN, {}).setdefault(ACCOUNTS, {})
+    interval = datetime.timedelta(seconds=90)
+    account = ZeehoAccountCoordinator(hass, _LOGGER, ("bench", vehicles), make_client(session, base_url))
+    hass.data[DOMAIN][ACCOUNTS][account.key] = account
+    members = [
+        ZeehoDataUpdateCoordinator(hass, _LOGGER, account, index, f"bench-{index}", interval, interval, interval)
+        for index in range(vehicles)
+    ]
+    for member in members:
+        account.async_register(member)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await account.async_refresh()
+        latencies.append(time.perf_counter() - start)
+    for member in members:
+        await account.async_unregister(member)
+    report(f"coordinator refresh{label} vehicles={vehicles}", latencies, items_per_op=vehicles)
+
+def bench_transforms(points):
+    """Scalar, batch and exact coordinate transforms over random points in China."""
+    rng = random.Random(0)
+    lngs = [rng.uniform(73.0, 135.0) for _ in range(points)]
+    lats = [rng.uniform(18.0, 53.0) for _ in range(points)]
+    for name, func in (
+        ("wgs84togcj02", utils.wgs84togcj02),
+        ("gcj02towgs84", utils.gcj02towgs84),
+        ("gcj02towgs84_exact", utils.gcj02towgs84_exact),
+        ("gcj02_to_bd09", utils.gcj02_to_bd09),
+    ):
+        latencies = []
+        for lng, lat in zip(lngs, lats):
+            start = time.perf_counter()
+            func(lng, lat)
+            latencies.append(time.perf_counter() - start)
+        report(f"utils.{name}", latencies)
+    for name, func in (
+        ("wgs84togcj02_batch", utils.wgs84togcj02_batch),
+        ("gcj02towgs84_batch", utils.gcj02towgs84_batch),
+    ):
+        start = time.perf_counter()
+        func(lngs, lats)
+        report(f"utils.{name} ({points} pts/op)", [time.perf_counter() - start], items_per_op=points)
+
+async def async_main(args):
+    with open(PAYLOAD_PATH, encoding="utf-8") as file:
+        vehicle_payload = json.load(file)["data"][0]
+    print(f"# python {sys.version.split()[0]}, numpy={'yes' if utils.np is not None else 'no'}")
+
+    bench_process_data(vehicle_payload, args.iterations * 10)
+    bench_transforms(args.points)
+
+    from homeassistant.core import HomeAssistant
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        server = StubZeehoServer(
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, changing=True
+        )
+        base_url = await server.start()
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for vehicles in args.vehicles:
+                server.set_vehicles(vehicles)
+                bench_decode(server.body, vehicles, args.iterations)
+                # Every response moves locationTime, so each refresh decodes and processes in full;
+                # the "unchanged" rows measure the path taken when the body repeats
+                for changing, label in ((True, ""), (False, " unchanged")):
+                    server.changing = changing
+                    await bench_client(session, base_url, vehicles, args.iterations, args.concurrency, label)
+                    await bench_coordinator(hass, session, base_url, vehicles, args.iterations, label)
+        await server.stop()
+        await hass.async_stop(force=True)
+    print(f"# stub server handled {server.requests} requests")
+
+def main():
+    parser = argparse.ArgumentParser(description="ZEEHO integration benchmarks")
+    parser.add_argument("--vehicles", default="1,10,100,1000",
+                        type=lambda value: [int(item) for item in value.split(",")],
+                        help="Comma-separated vehicle counts per account")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--points", type=int, default=20000, help="Points for coordinate transforms")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of HTTP 503 responses")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(async_main(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Local stub of tapi.zeehoev.com serving recorded vehicleHomePage payloads."""
+import asyncio
+import copy
+import datetime
+import json
+import os
+import random
+
+from aiohttp import web
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "payloads", "vehicleHomePage.json")
+API_PREFIX = "/v1.0/app/cfmotoserverapp"
+LOCATION_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _location_time_field(value):
+    """The ``locationTime`` member as it appears in a rendered body."""
+    return f'"locationTime": "{value.strftime(LOCATION_TIME_FORMAT)}"'.encode()
+
+class StubZeehoServer:
+    """Serve an N-vehicle vehicleHomePage response with configurable latency and failures.
+
+    ``error_rate`` is the share of requests answered with HTTP 503;
+    ``auth_error_rate`` the share answered with a non-10000 API code.
+    With ``changing``, every response advances each vehicle's
+    ``locationTime`` by a second, so clients cannot skip it as unchanged.
+    """
+
+    def __init__(self, vehicles=1, latency=0.0, jitter=0.0, error_rate=0.0, auth_error_rate=0.0,
+                 payload_path=PAYLOAD_PATH, seed=0, changing=False):
+        with open(payload_path, encoding="utf-8") as file:
+            self.template = json.load(file)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.auth_error_rate = auth_error_rate
+        self.changing = changing
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._runner = None
+        self.base_url = None
+        self.set_vehicles(vehicles)
+
+    def set_vehicles(self, count):
+        """Render the response body for ``count`` vehicles derived from the template."""
+        vehicle = self.template["data"][0]
+        vehicles = []
+        for index in range(count):
+            item = copy.deepcopy(vehicle)
+            item["vinNo"] = f"{vehicle['vinNo'][:-5]}{index:05d}"
+            item["deviceName"] = f"AE8-{index:04d}"
+            location = item["location"]
+            location["latitude"] = f"{float(location['latitude']) + index * 1e-4:.6f}"
+            location["longitude"] = f"{float(location['longitude']) + index * 1e-4:.6f}"
+            vehicles.append(item)
+        body = dict(self.template, data=vehicles)
+        self.body = json.dumps(body, ensure_ascii=False).encode()
+        self._first_location_time = datetime.datetime.strptime(vehicle["location"]["locationTime"], LOCATION_TIME_FORMAT)
+        self._location_time = _location_time_field(self._first_location_time)
+        self.auth_error_body = json.dumps({"code": "40001", "msg": "token expired", "data": []}).encode()
+
+    async def _handle_home_page(self, request):
+        self.requests += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < self.error_rate:
+            return web.Response(status=503, text="Service Unavailable")
+        if roll < self.error_rate + self.auth_error_rate:
+            return web.Response(body=self.auth_error_body, content_type="application/json")
+        return web.Response(body=self.render(), content_type="application/json")
+
+    def render(self):
+        """Return the body for the current request."""
+        if not self.changing:
+            return self.body
+        location_time = self._first_location_time + datetime.timedelta(seconds=self.requests)
+        return self.body.replace(self._location_time, _location_time_field(location_time))
+
+    async def _handle_unlock(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"code": "10000", "msg": "成功", "data": None})
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get(f"{API_PREFIX}/vehicleHomePage", self._handle_home_page)
+        app.router.add_post(f"{API_PREFIX}/vehicleSet/network/unlock", self._handle_unlock)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}{API_PREFIX}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def _main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vehicles", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    server = StubZeehoServer(args.vehicles, args.latency, error_rate=args.error_rate)
+    print(f"Serving {args.vehicles} vehicle(s) at {await server.start(port=args.port)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,19 +1,47 @@
 import datetime
 import logging
+import os
+import time
+from functools import partial
 
-from async_timeout import timeout
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from .api import ZeehoVehicleHomePageClient
+from homeassistant.util import dt as dt_util
+from .api import CircuitOpenError, ZeehoApiError, ZeehoAuthError, ZeehoVehicleHomePageClient
+from .breaker import CircuitBreaker
+from .geocoder import AddressCache, create_resolver
+from .geofence import EVENT_GEOFENCE, SIGNAL_GEOFENCES_UPDATED, GeofenceManager
+from .history import TrackPoint, TrackStore
+from .metrics import AccountMetrics, VehicleMetrics
+from .position import PositionFilter
+from .schema import PAYLOAD_PROJECTION, VehicleSnapshot, extract_snapshot
+from .scheduler import PRIORITY_ACTIVE, PRIORITY_PARKED, RequestScheduler
+from .simplify import TrackSimplifier, downsample
+from .stats import IMPORT_MINUTE, StatisticsImporter
+from .trips import TripDetector
+from .utils import (DATUM_BD09, DATUM_WGS84, DATUMS, gcj02_to_bd09_batch,
+                    gcj02towgs84_batch, gcj02_views)
 from .const import (
-    CONF_UPDATE_INTERVAL, CONF_XUHAO, MANUFACTURER,
+    CONF_UPDATE_INTERVAL, CONF_MIN_INTERVAL, CONF_MAX_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, CONF_XUHAO, MANUFACTURER, ACCOUNTS,
     COORDINATOR, DOMAIN, UNDO_UPDATE_LISTENER, CONF_Appid,
     CONF_Authorization, CONF_Cfmoto_X_Sign, CONF_Nonce,
-    CONF_Signature, API_BASE_URL
+    CONF_Signature, API_BASE_URL, ADDRESS_CACHE, CONF_ADDRESSAPI,
+    CONF_ADDRESSAPI_KEY, CONF_PRIVATE_KEY, CONF_HISTORY_CAPACITY,
+    DEFAULT_HISTORY_CAPACITY, CONF_GPS_CONVER, CONF_ATTR_SHOW, CONF_User_agent,
+    CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE,
+    CREDENTIALS, SCHEDULER, GEOFENCES, ATTR_TIERS, ATTR_TIER_FULL, ATTR_TIER_NONE, DEFAULT_ATTR_TIER
 )
-from homeassistant.exceptions import ConfigEntryAuthFailed
 
 from homeassistant.helpers.entity import DeviceInfo
 
@@ -22,44 +50,142 @@ _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [Platform.SENSOR, Platform.SWITCH, Platform.DEVICE_TRACKER]
 
 USER_AGENT = 'okhttp/4.9.2'
+
+# Entry data baked into the API clients; changing any of it needs a reload
+CREDENTIAL_KEYS = (
+    CONF_Authorization, CONF_Cfmoto_X_Sign, CONF_Appid, CONF_Nonce, CONF_Signature, CONF_User_agent, CONF_XUHAO,
+)
+
+# Keys that change on every poll without describing the vehicle; they never trigger entity updates
+VOLATILE_KEYS = frozenset({"querytime", "raw_latitude", "raw_longitude"})
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # Seconds to batch snapshot writes
+EVENT_TRIP = f"{DOMAIN}_trip"
 API_PATH_VEHICLE_HOME = "v1.0/app/cfmotoserverapp/vehicleHomePage"
 API_URL = f"{API_BASE_URL}/{API_PATH_VEHICLE_HOME}"
 
+SERVICE_GET_TRACK = "get_track"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MAX_POINTS = "max_points"
+ATTR_DATUM = "datum"
+GET_TRACK_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTRY_ID): cv.string,
+    vol.Required(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+    vol.Optional(ATTR_MAX_POINTS): vol.All(vol.Coerce(int), vol.Range(min=2)),
+    vol.Optional(ATTR_DATUM, default=DATUM_WGS84): vol.In(DATUMS),
+})
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Zeeho component."""
     hass.data.setdefault(DOMAIN, {})
+    address_cache = AddressCache(hass)
+    await address_cache.async_load()
+    hass.data[DOMAIN][ADDRESS_CACHE] = address_cache
+    hass.data[DOMAIN][SCHEDULER] = RequestScheduler(hass)
+    geofences = GeofenceManager(hass)
+    await geofences.async_load()
+    geofences.async_register_services()
+    hass.data[DOMAIN][GEOFENCES] = geofences
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_TRACK, partial(_async_handle_get_track, hass), schema=GET_TRACK_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
+async def _async_handle_get_track(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return a vehicle's recorded track, downsampled to ``max_points`` for long ranges."""
+    entry_data = hass.data[DOMAIN].get(call.data[ATTR_ENTRY_ID])
+    if not isinstance(entry_data, dict) or COORDINATOR not in entry_data:
+        raise ServiceValidationError(f"No loaded ZEEHO entry {call.data[ATTR_ENTRY_ID]}")
+    start = dt_util.as_utc(call.data[ATTR_START]).timestamp()
+    end = dt_util.as_utc(call.data[ATTR_END]).timestamp() if ATTR_END in call.data else time.time()
+    points = entry_data[COORDINATOR].get_track(start, end, call.data.get(ATTR_MAX_POINTS))
+    # The track is stored in GCJ02, as the API reports it
+    lngs = [point.longitude for point in points]
+    lats = [point.latitude for point in points]
+    if points and call.data[ATTR_DATUM] == DATUM_WGS84:
+        lngs, lats = gcj02towgs84_batch(lngs, lats)
+    elif points and call.data[ATTR_DATUM] == DATUM_BD09:
+        lngs, lats = gcj02_to_bd09_batch(lngs, lats)
+    return {
+        "points": [
+            {
+                "time": dt_util.utc_from_timestamp(point.timestamp).isoformat(),
+                "latitude": round(float(lat), 6),
+                "longitude": round(float(lng), 6),
+                "soc": point.soc,
+                "odometer": point.odometer,
+                "ride_state": point.ride_state,
+            }
+            for point, lng, lat in zip(points, lngs, lats)
+        ],
+    }
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Zeeho from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
-    vehicle_home_page_client = ZeehoVehicleHomePageClient(
-        entry.data[CONF_Authorization],
-        entry.data[CONF_Cfmoto_X_Sign],
-        entry.data[CONF_Appid],
-        entry.data[CONF_Nonce],
-        entry.data[CONF_Signature],
-        USER_AGENT
-    )
     xuhao = entry.data[CONF_XUHAO]
-    update_interval_seconds = entry.options.get(CONF_UPDATE_INTERVAL, 90)
+    update_interval, min_interval, max_interval = _intervals(entry)
     location_key = entry.unique_id
 
+    track_store = TrackStore(
+        _track_path(hass, entry),
+        entry.options.get(CONF_HISTORY_CAPACITY, DEFAULT_HISTORY_CAPACITY),
+    )
+    await hass.async_add_executor_job(track_store.open)
+    snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, _snapshot_key(entry))
+    stored = await snapshot_store.async_load()
+
+    account = _async_get_account(hass, entry)
     coordinator = ZeehoDataUpdateCoordinator(
         hass,
         _LOGGER,
-        vehicle_home_page_client,
+        account,
         xuhao,
         location_key,
-        update_interval=datetime.timedelta(seconds=update_interval_seconds),
+        update_interval=update_interval,
+        min_interval=min_interval,
+        max_interval=max_interval,
     )
-    await coordinator.async_config_entry_first_refresh()
+    coordinator.address_resolver = _create_address_resolver(hass, entry)
+    coordinator.gps_conver = entry.options.get(CONF_GPS_CONVER, True)
+    coordinator.attr_tier = get_attr_tier(entry.options)
+    coordinator.track_store = track_store
+    coordinator.track_simplifier.tolerance = entry.options.get(CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE)
+    coordinator.snapshot_store = snapshot_store
+    coordinator.geofence_manager = hass.data[DOMAIN].get(GEOFENCES)
+    if stored and stored.get("trips"):
+        coordinator.trips.restore(stored["trips"])
+    account.async_register(coordinator)
+    if stored and stored.get("snapshot"):
+        # Come up with the last known state right away and revalidate in the background
+        coordinator.async_restore(VehicleSnapshot.from_dict(stored["snapshot"]))
+        coordinator.async_revalidate()
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await account.async_unregister(coordinator)
+            await hass.async_add_executor_job(track_store.close)
+            raise
 
     hass.data[DOMAIN][entry.entry_id] = {
         COORDINATOR: coordinator,
+        CREDENTIALS: _credentials(entry),
     }
 
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_GEOFENCES_UPDATED, coordinator.async_refresh_geofences)
+    )
+    # Hourly SOC and odometer statistics, backfilled from the track history at startup
+    statistics = StatisticsImporter(hass, entry.entry_id, entry.title, coordinator)
+    entry.async_on_unload(async_track_time_change(hass, statistics.async_import, minute=IMPORT_MINUTE, second=0))
+    entry.async_create_background_task(hass, statistics.async_import(), f"{DOMAIN} statistics import")
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # Set up update listener
@@ -78,106 +204,752 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if update_listener is not None:
             update_listener()
 
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)[COORDINATOR]
+        await coordinator.account.async_unregister(coordinator)
+        if coordinator.snapshot_store is not None and coordinator._cached_data is not None:
+            # Write now, cancelling the delayed write that would otherwise land after async_remove_entry
+            await coordinator.snapshot_store.async_save(coordinator._snapshot_to_save())
+        coordinator.snapshot_store = None
+        if coordinator.track_store is not None:
+            await hass.async_add_executor_job(coordinator.track_store.close)
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the track history and saved snapshot of a removed entry."""
+    await Store(hass, SNAPSHOT_STORAGE_VERSION, _snapshot_key(entry)).async_remove()
+    path = _track_path(hass, entry)
+
+    def _remove():
+        if os.path.exists(path):
+            os.remove(path)
+
+    await hass.async_add_executor_job(_remove)
+
+def _track_path(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}_track_{entry.entry_id}.bin")
+
+def _snapshot_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}_snapshot_{entry.entry_id}"
+
+def _credentials(entry: ConfigEntry) -> tuple:
+    """Entry data that can only be applied by rebuilding the API clients."""
+    return tuple(entry.data.get(key) for key in CREDENTIAL_KEYS)
+
+def _intervals(entry: ConfigEntry) -> tuple:
+    """Return the (base, fastest, slowest) poll intervals from the entry options."""
+    return (
+        datetime.timedelta(seconds=entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)),
+        datetime.timedelta(seconds=entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)),
+        datetime.timedelta(seconds=entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)),
+    )
+
+def _create_address_resolver(hass: HomeAssistant, entry: ConfigEntry):
+    return create_resolver(
+        hass,
+        entry,
+        async_get_clientsession(hass),
+        hass.data[DOMAIN][ADDRESS_CACHE],
+        entry.options.get(CONF_ADDRESSAPI, "none"),
+        entry.options.get(CONF_ADDRESSAPI_KEY, ""),
+        entry.options.get(CONF_PRIVATE_KEY, ""),
+    )
+
+@callback
+def _async_get_account(hass: HomeAssistant, entry: ConfigEntry):
+    """Return the shared account coordinator for the entry's credentials."""
+    accounts = hass.data[DOMAIN].setdefault(ACCOUNTS, {})
+    key = (entry.data[CONF_Authorization], entry.data[CONF_Cfmoto_X_Sign])
+    account = accounts.get(key)
+    if account is None:
+        vehicle_home_page_client = ZeehoVehicleHomePageClient(
+            async_get_clientsession(hass),
+            entry.data[CONF_Authorization],
+            entry.data[CONF_Cfmoto_X_Sign],
+            entry.data[CONF_Appid],
+            entry.data[CONF_Nonce],
+            entry.data[CONF_Signature],
+            USER_AGENT,
+            metrics=AccountMetrics(),
+            breaker=CircuitBreaker(entry.title),
+        )
+        account = ZeehoAccountCoordinator(
+            hass, _LOGGER, key, vehicle_home_page_client, scheduler=hass.data[DOMAIN].get(SCHEDULER)
+        )
+        accounts[key] = account
+    return account
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Update options."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply option changes in place; reload only when the credentials changed."""
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is None:
+        return
+    if _credentials(entry) != entry_data[CREDENTIALS]:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    coordinator = entry_data[COORDINATOR]
+    coordinator.async_set_intervals(*_intervals(entry))
+    coordinator.address_resolver = _create_address_resolver(hass, entry)
+    coordinator.gps_conver = entry.options.get(CONF_GPS_CONVER, True)
+    attr_tier = get_attr_tier(entry.options)
+    if attr_tier != coordinator.attr_tier:
+        coordinator.attr_tier = attr_tier
+        coordinator.changed_keys = None
+        coordinator.async_update_listeners()
+    await coordinator.async_resize_track(entry.options.get(CONF_HISTORY_CAPACITY, DEFAULT_HISTORY_CAPACITY))
+    coordinator.track_simplifier.tolerance = entry.options.get(CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE)
+    # Reprocess the next payload even if it is unchanged, so the new options show up
+    coordinator.async_invalidate()
+
+class ZeehoAccountCoordinator(DataUpdateCoordinator):
+    """Fetch vehicleHomePage once per interval for every vehicle on an account.
+
+    The response lists all vehicles of the account, so entries sharing the
+    same Authorization/Cfmoto_X_Sign register here and receive their slice
+    through ``ZeehoDataUpdateCoordinator``.
+    """
+
+    def __init__(self, hass, logger, key, vehicle_home_page_client, scheduler=None):
+        super().__init__(hass, logger, name=f"{DOMAIN}_account")
+        self.key = key
+        self.vehicle_home_page_client = vehicle_home_page_client
+        self.vehicles = {}  # Vehicle coordinator -> requested update interval
+        # Nominal poll interval; update_interval holds the delay to the next phase slot
+        self.poll_interval = None
+        self.scheduler = scheduler
+        if scheduler is not None:
+            scheduler.add(self)
+        self.metrics = vehicle_home_page_client.metrics or AccountMetrics()
+        self.breaker = vehicle_home_page_client.breaker or CircuitBreaker(DOMAIN)
+        vehicle_home_page_client.breaker = self.breaker
+        self.serving_stale = False  # True while the last good vehicle list stands in for a failed fetch
+        self._last_fetch = None
+        self._selected = frozenset()  # Vehicle positions the client decodes
+        self._background_refresh = None
+        self._next_poll = None  # Loop time the pending poll is due
+
+    @callback
+    def async_register(self, vehicle):
+        """Attach a vehicle coordinator and poll at the fastest requested interval."""
+        self.async_set_interval(vehicle, vehicle.desired_interval)
+        self._async_select()
+        vehicle.async_attach()
+
+    @callback
+    def async_set_interval(self, vehicle, update_interval):
+        """Record a vehicle's requested interval; applies from the next scheduled poll."""
+        self.vehicles[vehicle] = update_interval
+        self.poll_interval = min(self.vehicles.values())
+        self._async_align()
+
+    @callback
+    def _async_select(self):
+        """Have the client decode only the registered vehicles and the schema's keys."""
+        positions = frozenset(vehicle.api_xuhao for vehicle in self.vehicles)
+        if not positions <= self._selected:
+            # The cached vehicle list lacks the new vehicle; the next request fetches it
+            self._last_fetch = None
+        self._selected = positions
+        self.vehicle_home_page_client.select(positions, PAYLOAD_PROJECTION)
+
+    @property
+    def priority(self):
+        """Scheduling priority: accounts with a vehicle on the move or charging go first."""
+        return PRIORITY_ACTIVE if any(vehicle.active for vehicle in self.vehicles) else PRIORITY_PARKED
+
+    @callback
+    def _async_align(self):
+        """Aim the next scheduled poll at this account's phase slot."""
+        if self.poll_interval is None:
+            return
+        if self.scheduler is None:
+            self.update_interval = self.poll_interval
+        else:
+            self.update_interval = self.scheduler.next_delay(self, self.poll_interval)
+        if (
+            self._unsub_refresh is not None
+            and self._next_poll is not None
+            and self.hass.loop.time() + self.update_interval.total_seconds() < self._next_poll - 1
+        ):
+            # The pending poll was armed with a longer interval, e.g. a parked vehicle
+            # that just set off; bring it forward instead of waiting out the old delay
+            self._schedule_refresh()
+
+    @callback
+    def _schedule_refresh(self):
+        super()._schedule_refresh()
+        self._next_poll = (
+            self.hass.loop.time() + self.update_interval.total_seconds() if self._unsub_refresh is not None else None
+        )
+
+    @callback
+    def async_realign(self):
+        """Move the pending poll onto this account's phase slot after the phases changed."""
+        self._async_align()
+        self.async_reschedule()
+
+    @callback
+    def async_reschedule(self):
+        """Restart the poll timer so the current interval counts from now."""
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def async_unregister(self, vehicle):
+        """Detach a vehicle coordinator; drop the account when none are left."""
+        vehicle.async_detach()
+        self.vehicles.pop(vehicle, None)
+        if self.vehicles:
+            self.poll_interval = min(self.vehicles.values())
+            self._async_align()
+            self._async_select()
+            return
+        if self.scheduler is not None:
+            self.scheduler.remove(self)
+        await self.async_shutdown()
+        self.hass.data[DOMAIN].get(ACCOUNTS, {}).pop(self.key, None)
+
+    @callback
+    def async_refresh_in_background(self):
+        """Start a background refresh; vehicles asking while one runs share it."""
+        if self._background_refresh is None or self._background_refresh.done():
+            self._background_refresh = self.hass.async_create_background_task(
+                self.async_refresh(), f"{DOMAIN} account refresh"
+            )
+
+    def is_fresh(self, max_age):
+        """Return True if the last successful fetch is younger than max_age seconds."""
+        if self.data is None or self._last_fetch is None or not self.last_update_success:
+            return False
+        return (datetime.datetime.now() - self._last_fetch).total_seconds() < max_age
+
+    async def _async_update_data(self):
+        """Fetch the vehicle list, serving the last good list while the API is failing."""
+        self.serving_stale = False
+        try:
+            if self.scheduler is None:
+                resdata = await self.vehicle_home_page_client.async_get_data()
+            else:
+                async with self.scheduler.slot(self.priority):
+                    resdata = await self.vehicle_home_page_client.async_get_data()
+        except ZeehoAuthError as error:
+            self.metrics.record_failure(error)
+            raise UpdateFailed(f"ZEEHO API rejected the credentials: {error}") from error
+        except ZeehoApiError as error:
+            if not isinstance(error, CircuitOpenError):
+                self.metrics.record_failure(error)
+            if self.data is None or self.breaker.auth_failed:
+                raise UpdateFailed(f"Error communicating with ZEEHO API: {error}") from error
+            _LOGGER.debug("Serving the last vehicle list: %s", error)
+            self.serving_stale = True
+            return self.data
+        finally:
+            # Vehicles re-align when they report their interval; this covers polls they ignore
+            self._async_align()
+
+        self.metrics.record_success()
+        self._last_fetch = datetime.datetime.now()
+        return resdata["data"]
 
 class ZeehoDataUpdateCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, logger, vehicle_home_page_client, xuhao, location_key, update_interval):
-        super().__init__(hass, logger, name=DOMAIN, update_interval=update_interval)
-        self.vehicle_home_page_client = vehicle_home_page_client
+    """Per-vehicle view on a shared ``ZeehoAccountCoordinator``.
+
+    Polling is driven by the account; this coordinator only processes the
+    ``data[xuhao]`` slice and pushes it to the entities of its config entry.
+    """
+
+    def __init__(self, hass, logger, account, xuhao, location_key, update_interval, min_interval, max_interval):
+        super().__init__(hass, logger, name=DOMAIN)
+        self.account = account
         self.api_xuhao = xuhao
         self.location_key = location_key
+        # Adaptive polling: fast while active, exponential backoff while parked and locked
+        self.base_interval = update_interval
+        self.min_interval = min(min_interval, update_interval)
+        self.max_interval = max(max_interval, update_interval)
+        self.desired_interval = update_interval
+        self._parked_polls = 0
+        self.active = False  # Riding, charging or moving; polls get scheduling priority
+        self.address_resolver = None
+        self.gps_conver = True
+        self.attr_tier = DEFAULT_ATTR_TIER  # How much entities put in their attributes
+        self.track_store = None
+        self.track_simplifier = TrackSimplifier()
+        self.snapshot_store = None
+        self.geofence_manager = None
+        self.geofences = frozenset()  # Ids of the fences the vehicle is in
+        self._geofences_seeded = False
+        self.trips = TripDetector()
+        self.position_filter = PositionFilter()
+        self._optimistic = {}  # Key -> (optimistic value, live value) until the API reports it
+        # True while entities show a restored or last-good snapshot instead of a live one
+        self.stale = False
+        # Change detection: keys that differ from the previous snapshot (None = notify everyone)
+        self.changed_keys = None
+        self.snapshot_unchanged = False
+        self._last_raw = None
+        self._notified_success = None
         self._cached_data = None  # Variable to store cached data
         self._last_update = None   # Variable to store last update timestamp
+        self._refreshing = False
+        self._unsub_account = None
+        self.metrics = VehicleMetrics()
+
+    @callback
+    def async_attach(self):
+        """Start receiving account updates."""
+        if self._unsub_account is None:
+            self._unsub_account = self.account.async_add_listener(self._handle_account_update)
+
+    @callback
+    def async_detach(self):
+        """Stop receiving account updates."""
+        if self._unsub_account is not None:
+            self._unsub_account()
+            self._unsub_account = None
+
+    @callback
+    def _handle_account_update(self):
+        """Fan out a fresh account fetch to this vehicle's entities."""
+        if self._refreshing:
+            return
+        if not self.account.last_update_success:
+            if self._keep_stale():
+                return
+            self.changed_keys = None
+            self.async_set_update_error(self.account.last_exception)
+            return
+        try:
+            processed_data = self._process_account_data(self.account.data)
+        except UpdateFailed as error:
+            self.changed_keys = None
+            self.async_set_update_error(error)
+            return
+        self.async_set_updated_data(processed_data)
+
+    @callback
+    def async_update_listeners(self):
+        """Notify only the entities whose source keys changed in the last snapshot."""
+        changed = self.changed_keys
+        self.changed_keys = None
+        if changed is None or self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        if not changed:
+            _LOGGER.debug("Snapshot unchanged for %s; only updating metric entities", self.location_key)
+        # Listeners without a context (metric sensors) follow every update
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or not changed.isdisjoint(context):
+                update_callback()
+
+    @callback
+    def async_set_intervals(self, update_interval, min_interval, max_interval):
+        """Apply new polling bounds and reschedule the account poll."""
+        self.base_interval = update_interval
+        self.min_interval = min(min_interval, update_interval)
+        self.max_interval = max(max_interval, update_interval)
+        self._parked_polls = 0
+        if self.data is not None:
+            self._adapt_interval(self.data)
+        else:
+            self.desired_interval = update_interval
+            if self._unsub_account is not None:
+                self.account.async_set_interval(self, update_interval)
+        self.account.async_reschedule()
+
+    @callback
+    def async_invalidate(self):
+        """Drop the raw payload memo so the next payload is processed in full."""
+        self._last_raw = None
+
+    @callback
+    def async_restore(self, snapshot):
+        """Publish a snapshot saved by a previous run, marked stale until the API answers."""
+        self.stale = True
+        self.data = self._cached_data = snapshot = self._project(snapshot)
+        self.position_filter.seed(snapshot.longitude, snapshot.latitude)
+        self._last_update = datetime.datetime.now()
+        # Membership at the restored position, so moves while we were down fire events
+        self._update_geofences(snapshot)
+
+    @callback
+    def async_revalidate(self):
+        """Replace a restored snapshot with live data without blocking setup."""
+        max_age = self.account.poll_interval.total_seconds() / 10
+        if self.account.is_fresh(max_age):
+            self._handle_account_update()
+        else:
+            self.account.async_refresh_in_background()
+
+    def _keep_stale(self):
+        """Return True if a failed fetch should leave the stale snapshot in place."""
+        return self.stale and self._cached_data is not None and not self.account.breaker.auth_failed
 
     async def _async_update_data(self):
-        """Fetch and process data from the ZEEHO API with caching."""
+        """Return this vehicle's data, refreshing the shared account fetch when needed."""
         current_time = datetime.datetime.now()
+        max_age = self.account.poll_interval.total_seconds() / 10
 
         # Check if cached data is still valid (e.g., within the last 5 minutes)
-        if self._cached_data and (current_time - self._last_update).total_seconds() < self.update_interval.total_seconds() / 10:
+        if self._cached_data and (current_time - self._last_update).total_seconds() < max_age:
             _LOGGER.debug("Using cached data")
+            self.metrics.cache_hits += 1
+            self.changed_keys = frozenset()
             return self._cached_data
 
-        try:
-            async with timeout(10):
-                resdata = await self.hass.async_add_executor_job(self.vehicle_home_page_client.get_data)
-
-            if not resdata or "data" not in resdata:
-                raise UpdateFailed("Invalid data structure received from API")
+        self.metrics.cache_misses += 1
 
-            if resdata.get("code") != "10000":
-                raise ConfigEntryAuthFailed("API returned error code")
+        if not self.account.is_fresh(max_age):
+            self._refreshing = True
+            try:
+                await self.account.async_refresh()
+            finally:
+                self._refreshing = False
 
-            data = resdata["data"][self.api_xuhao]
-            if not data:
-                raise UpdateFailed("Empty data received from API")
+        if not self.account.last_update_success:
+            if self._keep_stale():
+                self.changed_keys = frozenset()
+                return self._cached_data
+            raise UpdateFailed(f"Unexpected error: {self.account.last_exception}")
 
-            # Process the data and log the processed output for debugging
-            processed_data = self.process_data(data)
-            _LOGGER.debug("Processed data: %s", processed_data)
+        return self._process_account_data(self.account.data)
 
-            # Update cache
-            self._cached_data = processed_data
-            self._last_update = current_time  # Update the last update timestamp
-
-            return processed_data
-
-        except Exception as error:
-            _LOGGER.error("Error updating data: %s", error)
-            raise UpdateFailed(f"Unexpected error: {error}")
-
-    def process_data(self, data):
-        """Process the raw data from the API."""
-        querytime = datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
-        rideState = "Online" if data.get("rideState") == "在线" else "Offline"
-        chargeState = "Charging" if data.get("chargeState") == "1" else "Fully Charged" if data.get("bmssoc") == "100" else "On Battery"
-        headLockState = "Unlocked" if data.get("headLockState") == "0" else "Locked" if data.get("headLockState") == "1" else f"Unknown {data.get('headLockState', 'Unknown')}"
-
-        return {
-            "location_key": self.location_key,
-            "device_model": data.get("vehicleModel", "ZeehoEV"),
-            "vehicleName": data.get("vehicleName", "ZeehoEV"),
-            "querytime": querytime,
-            # "latitude": self._safe_float(data.get("latitude")),
-            # "longitude": self._safe_float(data.get("longitude")),
-            "latitude": self._safe_float(data.get("location", {}).get("latitude")),
-            "longitude": self._safe_float(data.get("location", {}).get("longitude")),
-            "headLockState": headLockState,
-            "bmssoc": self._safe_int(data.get("bmssoc")),
-            "chargeState": chargeState,
-            "locationTime": data.get("location", {}).get("locationTime"),
-            "vinNo": data.get("vinNo"),
-            "deviceName": data.get("deviceName"),
-            "hmiRidableMile": self._safe_int(data.get("hmiRidableMile")),
-            "rideState": rideState,
-            "greenContribution": self._safe_float(data.get("greenContribution")),
-            "otaVersion": data.get("otaVersion"),
-            "vehicleType": data.get("vehicleType"),
-            "vehicleTypeName": data.get("vehicleTypeName"),
-            "totalRideMile": self._safe_float(data.get("totalRideMile")),
-            "maxMileage": self._safe_int(data.get("maxMileage")),
-            "onlineStatus": data.get("onlineStatus"),
-        }
+    def _process_account_data(self, vehicles):
+        """Select and process this vehicle's entry from the account vehicle list."""
+        try:
+            data = vehicles[self.api_xuhao]
+        except (IndexError, KeyError, TypeError):
+            data = None
+        if not data:
+            raise UpdateFailed("Empty data received from API")
+
+        previous = self._cached_data
+        if previous is not None and self.account.serving_stale:
+            # API unavailable: keep the last good snapshot, querytime included
+            self.changed_keys = frozenset() if self.stale else None
+            self.stale = True
+            return previous
+        if (
+            previous is not None
+            and (data is self._last_raw or data == self._last_raw)
+            and self._position_settled(previous)
+        ):
+            # Fast path: identical vehicle payload, only freshness metadata moves. A repeated
+            # response body is not even decoded; the client hands back the same objects.
+            self.snapshot_unchanged = True
+            self.changed_keys = frozenset()
+            self.metrics.unchanged_payloads += 1
+            previous = previous.replace(querytime=datetime.datetime.now(tz=datetime.timezone.utc).isoformat())
+            if self._update_trip(previous):
+                # An idle trip timed out
+                self.changed_keys = frozenset({"trip"})
+                self._schedule_save()
+            if self.stale:
+                # Live again with an unchanged payload; every entity shows the stale flag
+                self.stale = False
+                self.changed_keys = None
+            self._adapt_interval(previous)
+            self.metrics.location_age = self._location_age(previous)
+            self._cached_data = previous
+            self._last_update = datetime.datetime.now()
+            return previous
+
+        # Process the data and log the processed output for debugging
+        started = time.perf_counter()
+        processed_data = self._apply_optimistic(self.process_data(data))
+        self.metrics.process.observe((time.perf_counter() - started) * 1000)
+        _LOGGER.debug("Processed data: %s", processed_data)
+        self._adapt_interval(processed_data)
+        self.metrics.location_age = self._location_age(processed_data)
+        processed_data = self._resolve_address(processed_data)
+        self._record_track(processed_data)
+        geofences_changed = self._update_geofences(processed_data)
+        trip_changed = self._update_trip(processed_data)
+
+        self.snapshot_unchanged = False
+        # Leaving a stale snapshot refreshes every entity, whatever changed
+        self.changed_keys = None if self.stale else self._diff(previous, processed_data)
+        if geofences_changed and self.changed_keys is not None:
+            self.changed_keys |= {"geofences"}
+        if trip_changed and self.changed_keys is not None:
+            self.changed_keys |= {"trip"}
+        self.stale = False
+        self._last_raw = data
+
+        # Update cache
+        self._cached_data = processed_data
+        self._last_update = datetime.datetime.now()  # Update the last update timestamp
+        self._schedule_save()
+
+        return processed_data
 
     @staticmethod
-    def _safe_float(value):
+    def _diff(old, new):
+        """Return the non-volatile keys whose values differ, or None without a previous snapshot."""
+        if old is None:
+            return None
+        return new.diff(old) - VOLATILE_KEYS
+
+    def _record_track(self, data):
+        """Append the snapshot to the track history when anything tracked changed."""
+        if self.track_store is None or data.get("latitude") is None or data.get("longitude") is None:
+            return
+        point = TrackPoint(
+            time.time(),
+            data["latitude"],
+            data["longitude"],
+            data.get("bmssoc"),
+            data.get("totalRideMile"),
+            data.get("rideState"),
+        )
+        self.track_simplifier.append(self.track_store, point)
+
+    async def async_resize_track(self, capacity):
+        """Change the track capacity, pausing recording and queries while the file is rewritten."""
+        store = self.track_store
+        if store is None or capacity == store.capacity:
+            return
+        # Nothing on the event loop may touch the mapping while the executor reopens it
+        self.track_store = None
         try:
-            return float(value)
-        except (ValueError, TypeError):
+            await self.hass.async_add_executor_job(store.resize, capacity)
+        finally:
+            self.track_store = store
+
+    def get_track(self, start, end, max_points=None):
+        """Return recorded track points between two epoch timestamps.
+
+        With ``max_points``, longer results are downsampled by time bucket to
+        about that many points.
+        """
+        if self.track_store is None:
+            return []
+        points = self.track_store.query(start, end)
+        if max_points and len(points) > max_points:
+            points = downsample(points, (points[-1].timestamp - points[0].timestamp) / max_points)
+        return points
+
+    @callback
+    def async_set_optimistic(self, key, value):
+        """Publish the value a command should produce, ahead of the API confirming it."""
+        if self.data is None:
+            return
+        live = self._optimistic[key][1] if key in self._optimistic else self.data.get(key)
+        self._optimistic[key] = (value, live)
+        self._publish({key: value})
+
+    @callback
+    def async_rollback(self, key):
+        """Drop an unconfirmed optimistic value and show the reported one again."""
+        entry = self._optimistic.pop(key, None)
+        if entry is not None and self.data is not None:
+            self._publish({key: entry[1]})
+
+    def is_optimistic(self, key):
+        return key in self._optimistic
+
+    def _apply_optimistic(self, data):
+        """Overlay pending optimistic values; the ones the API now reports are confirmed."""
+        if not self._optimistic:
+            return data
+        for key, (value, _) in list(self._optimistic.items()):
+            live = data.get(key)
+            if live == value:
+                del self._optimistic[key]
+            else:
+                self._optimistic[key] = (value, live)
+        return data.replace(**{key: value for key, (value, _) in self._optimistic.items()})
+
+    @callback
+    def _publish(self, values):
+        self.data = self._cached_data = self.data.replace(**values)
+        self.changed_keys = frozenset(values)
+        self.async_update_listeners()
+
+    @callback
+    def async_refresh_geofences(self):
+        """Re-evaluate fence membership after the fences changed.
+
+        No events are fired: the vehicle did not move, and zones being loaded
+        at startup must not look like arrivals.
+        """
+        if self.data is not None and self._update_geofences(self.data, fire_events=False):
+            self.changed_keys = frozenset({"geofences"})
+            self.async_update_listeners()
+
+    def _update_geofences(self, data, fire_events=True):
+        """Update fence membership for a snapshot; return True if it changed.
+
+        The first evaluation only seeds the membership.
+        """
+        manager = self.geofence_manager
+        if manager is None or data.get("latitude") is None or data.get("longitude") is None:
+            return False
+        previous = self.geofences
+        inside = manager.index.inside(data["longitude"], data["latitude"], previous)
+        seeded = self._geofences_seeded
+        self._geofences_seeded = True
+        if inside == previous:
+            return False
+        self.geofences = inside
+        if fire_events and seeded:
+            for fence_id in sorted(inside - previous):
+                self._fire_geofence_event(fence_id, "enter", data)
+            for fence_id in sorted(previous - inside):
+                if fence_id in manager.index:
+                    self._fire_geofence_event(fence_id, "exit", data)
+        return True
+
+    def _fire_geofence_event(self, fence_id, event, data):
+        _LOGGER.debug("%s %s geofence %s", self.location_key, event, fence_id)
+        self.hass.bus.async_fire(EVENT_GEOFENCE, {
+            "entry_id": self.config_entry.entry_id,
+            "fence_id": fence_id,
+            "name": self.geofence_manager.name(fence_id),
+            "event": event,
+            "latitude": data["latitude"],
+            "longitude": data["longitude"],
+        })
+
+    def _update_trip(self, data):
+        """Feed the snapshot to the trip detector; return True if a trip ended."""
+        events = self.trips.update(
+            time.time(),
+            data.get("rideState") == "Online",
+            data.get("totalRideMile"),
+            data.get("bmssoc"),
+            data.get("longitude"),
+            data.get("latitude"),
+        )
+        for event, trip in events:
+            _LOGGER.debug("%s trip %s: %s", self.location_key, event, trip)
+            self.hass.bus.async_fire(EVENT_TRIP, {"entry_id": self.config_entry.entry_id, "event": event, **trip})
+        return any(event == "end" for event, _ in events)
+
+    def _resolve_address(self, data):
+        """Fill in the address from cache; misses are geocoded in the background."""
+        if self.address_resolver is None or data.latitude is None or data.longitude is None:
+            return data
+        address = self.address_resolver.lookup(data.longitude, data.latitude, self._handle_address)
+        return data.replace(address=address) if address is not None else data
+
+    @callback
+    def _handle_address(self, key, address):
+        """Publish a geocoded address if the vehicle is still in that cell."""
+        data = self.data
+        if not data or data.get("latitude") is None or data.get("longitude") is None:
+            return
+        if self.address_resolver is None or self.address_resolver.cache_key(data["longitude"], data["latitude"]) != key:
+            return
+        self.data = self._cached_data = data.replace(address=address)
+        self.changed_keys = frozenset({"address"})
+        self._schedule_save()
+        self.async_update_listeners()
+
+    def _schedule_save(self):
+        """Persist the current snapshot for the next startup, batching writes."""
+        if self.snapshot_store is not None:
+            self.snapshot_store.async_delay_save(self._snapshot_to_save, SNAPSHOT_SAVE_DELAY)
+
+    def _snapshot_to_save(self):
+        return {"snapshot": self._cached_data.as_dict(), "trips": self.trips.as_dict()}
+
+    def _adapt_interval(self, data):
+        """Pick the next poll interval from ride, charge and location freshness."""
+        location_age = self._location_age(data)
+        moving = location_age is not None and location_age < self.base_interval.total_seconds()
+
+        self.active = data.get("rideState") == "Online" or data.get("chargeState") == "Charging" or moving
+        if self.active:
+            self._parked_polls = 0
+            interval = self.min_interval
+        elif data.get("headLockState") == "Locked":
+            self._parked_polls += 1
+            factor = 2 ** min(self._parked_polls - 1, 16)
+            interval = min(self.base_interval * factor, self.max_interval)
+        else:
+            self._parked_polls = 0
+            interval = self.base_interval
+
+        if interval != self.desired_interval:
+            _LOGGER.debug("Adjusting update interval for %s to %s", self.location_key, interval)
+        self.desired_interval = interval
+        if self._unsub_account is not None:
+            self.account.async_set_interval(self, interval)
+
+    def _location_age(self, data):
+        """Return how many seconds locationTime lags behind querytime, if known."""
+        location_time = self._parse_location_time(data.get("locationTime"))
+        if location_time is None:
             return None
+        query_time = dt_util.parse_datetime(data.get("querytime") or "") or dt_util.utcnow()
+        return (query_time - location_time).total_seconds()
 
     @staticmethod
-    def _safe_int(value):
-        try:
-            return int(value)
-        except (ValueError, TypeError):
+    def _parse_location_time(value):
+        """Parse locationTime given as epoch (s/ms) or a local date-time string."""
+        if value in (None, ""):
+            return None
+        text = str(value)
+        if text.isdigit():
+            timestamp = int(text)
+            if timestamp > 1e11:
+                timestamp /= 1000
+            return dt_util.utc_from_timestamp(timestamp)
+        parsed = dt_util.parse_datetime(text)
+        if parsed is None:
             return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        return parsed
+
+    def process_data(self, data):
+        """Process the raw data from the API into an immutable snapshot."""
+        querytime = datetime.datetime.now(tz=datetime.timezone.utc).isoformat()
+        snapshot = extract_snapshot(data, location_key=self.location_key, querytime=querytime)
+        return self._project(self._filter_position(snapshot))
+
+    def _position_settled(self, data):
+        """Feed a repeated fix to the position filter; return False if it now moves the position.
+
+        A parked vehicle that was moved keeps reporting its new fix, and each
+        repeat counts towards the median that lets the published position follow.
+        """
+        if data.raw_latitude is None or (data.raw_latitude, data.raw_longitude) == (data.latitude, data.longitude):
+            return True
+        lng, lat = self.position_filter.update(
+            data.raw_longitude, data.raw_latitude, data.rideState == "Online", data.totalRideMile
+        )
+        return (lng, lat) == (data.longitude, data.latitude)
+
+    def _filter_position(self, data):
+        """Publish a stable position while parked; the fix as reported stays in raw_latitude/raw_longitude."""
+        lng, lat = self.position_filter.update(
+            data.longitude, data.latitude, data.rideState == "Online", data.totalRideMile
+        )
+        return data.replace(latitude=lat, longitude=lng, raw_latitude=data.latitude, raw_longitude=data.longitude)
+
+    def _project(self, data):
+        """Fill in the tracker, Gaode and Baidu positions from the reported GCJ02 position."""
+        if data.latitude is None or data.longitude is None:
+            return data
+        views = gcj02_views(data.longitude, data.latitude)
+        return data.replace(
+            thislat=views.wgs_lat if self.gps_conver else views.gcj_lat,
+            thislon=views.wgs_lng if self.gps_conver else views.gcj_lng,
+            map_gcj_lat=views.gcj_lat,
+            map_gcj_lng=views.gcj_lng,
+            map_bd_lat=views.bd_lat,
+            map_bd_lng=views.bd_lng,
+        )
+
+def get_attr_tier(options):
+    """Return the attribute tier from entry options, mapping the old on/off setting."""
+    value = options.get(CONF_ATTR_SHOW, DEFAULT_ATTR_TIER)
+    if isinstance(value, bool):
+        return ATTR_TIER_FULL if value else ATTR_TIER_NONE
+    return value if value in ATTR_TIERS else DEFAULT_ATTR_TIER
 
 def get_device_info(coordinator):
     """Generate device info from coordinator data."""
@@ -1,12 +1,55 @@
-import requests
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+import aiohttp
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
 from .utils import get_cfmoto_x_param_str, get_epoch_time_str
-from .const import API_BASE_URL
+from .const import API_BASE_URL, REQUEST_TIMEOUT
+from .schema import project
+
+_LOGGER = logging.getLogger(__name__)
+
+# orjson decodes the vehicle list about twice as fast as the json module; both raise ValueError subclasses
+json_loads = orjson.loads if orjson is not None else json.loads
+
+class ZeehoApiError(Exception):
+    """The ZEEHO API could not be reached or returned an unusable response."""
+
+class ZeehoAuthError(ZeehoApiError):
+    """The ZEEHO API rejected the credentials."""
+
+class CircuitOpenError(ZeehoApiError):
+    """Requests are paused by the account's circuit breaker."""
 
 class ZeehoAPIClient:
-    def __init__(self, authorization: str, appid: str, user_agent: str):
+    """Base client sharing one pooled aiohttp session.
+
+    The session is owned by Home Assistant (``async_get_clientsession``), so
+    connections to tapi.zeehoev.com are kept alive and reused by every
+    client of every config entry. The vehicleHomePage clients of one
+    account share a ``CircuitBreaker`` so an outage pauses all of their
+    polls; the unlock client has a breaker of its own.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, authorization: str, appid: str, user_agent: str,
+                 request_timeout: float = REQUEST_TIMEOUT, base_url: str = API_BASE_URL, metrics=None,
+                 breaker=None):
+        self.session = session
+        self.base_url = base_url
+        self.metrics = metrics  # Optional AccountMetrics receiving round-trip and decode timings
+        self.breaker = breaker  # Optional CircuitBreaker, shared by an account's polling clients
         self.authorization = authorization
         self.appid = appid
         self.user_agent = user_agent
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout)
 
     def get_base_headers(self) -> dict:
         return {
@@ -15,18 +58,77 @@ class ZeehoAPIClient:
             'Accept-Language': 'zh-CN',
             'Appid': self.appid,
             'X-App-Info': 'MOBILE|iOS|18.0|ZEEHO_APP|2.5.20|iPhone|iPhone 14 Pro Max|1290*2796|3EEE1D62-8E74-4A2D-8091-3008D758E980|WiFi|iOS',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # No Accept-Encoding: aiohttp offers exactly the encodings it can decode (br only with Brotli installed)
             'User-Agent': self.user_agent,
         }
 
+    async def _async_request(self, method: str, url: str, parse, retries: int = 0, **kwargs):
+        """Send a request through the circuit breaker and return ``parse(body, round_trip)``.
+
+        Transient errors (network, timeout, HTTP errors, undecodable body) are
+        retried up to ``retries`` times within the breaker's retry budget and
+        then raised as ``ZeehoApiError``; rejected credentials raise
+        ``ZeehoAuthError`` without retrying.
+        """
+        breaker = self.breaker
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"Requests paused for {breaker.retry_after():.0f} s after repeated failures")
+            started = time.perf_counter()
+            try:
+                async with self.session.request(method, url, timeout=self.timeout, **kwargs) as response:
+                    if response.status in (401, 403):
+                        raise ZeehoAuthError(f"HTTP {response.status}")
+                    response.raise_for_status()
+                    body = await response.read()
+                result = parse(body, time.perf_counter() - started)
+            except ZeehoAuthError:
+                if breaker is not None:
+                    breaker.record_auth_failure()
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+                delay = breaker.acquire_retry(attempt) if breaker is not None and attempt < retries else None
+                if delay is None:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise ZeehoApiError(str(error) or type(error).__name__) from error
+                _LOGGER.debug("Retrying %s in %.1f s after: %s", url, delay, error or type(error).__name__)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled or unexpected: no verdict on the API, so a half-open probe may go again
+                if breaker is not None:
+                    breaker.release_probe()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
 class ZeehoVehicleHomePageClient(ZeehoAPIClient):
     API_PATH = "vehicleHomePage"
 
-    def __init__(self, authorization: str, cfmoto_x_sign: str, appid: str, nonce: str, signature: str, user_agent: str):
-        super().__init__(authorization, appid, user_agent)
+    def __init__(self, session: aiohttp.ClientSession, authorization: str, cfmoto_x_sign: str, appid: str,
+                 nonce: str, signature: str, user_agent: str, request_timeout: float = REQUEST_TIMEOUT,
+                 base_url: str = API_BASE_URL, metrics=None, breaker=None):
+        super().__init__(session, authorization, appid, user_agent, request_timeout, base_url, metrics, breaker)
         self.cfmoto_x_sign = cfmoto_x_sign
         self.nonce = nonce
         self.signature = signature
+        # Fingerprint of the last body and its decoded JSON, reused while the body repeats
+        self._fingerprint = None
+        self._decoded = None
+        self._selection = None  # (vehicle positions, payload projection) kept when decoding
+
+    def select(self, positions, projection) -> None:
+        """Keep only these vehicles of the list, and only the keys in ``projection``.
+
+        Unselected positions decode to None so indices stay valid. Pass None
+        for ``positions`` to keep the whole payload.
+        """
+        self._selection = (frozenset(positions), projection) if positions is not None else None
+        self._fingerprint = None
 
     def get_headers(self) -> dict:
         headers = self.get_base_headers()
@@ -40,21 +142,51 @@ class ZeehoVehicleHomePageClient(ZeehoAPIClient):
         })
         return headers
 
-    def get_data(self) -> dict:
-        url = f"{API_BASE_URL}/{self.API_PATH}"
-        try:
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            _LOGGER.error("Error fetching data from ZEEHO API: %s", e)
-            return {}
+    async def async_get_data(self) -> dict:
+        """Fetch vehicleHomePage; returns the previous object if the body is unchanged.
+
+        Raises ``ZeehoAuthError`` for a non-10000 API code and
+        ``ZeehoApiError`` for anything else that goes wrong.
+        """
+        url = f"{self.base_url}/{self.API_PATH}"
+        return await self._async_request("GET", url, self._parse, retries=2, headers=self.get_headers())
+
+    def _parse(self, body: bytes, round_trip: float) -> dict:
+        received = time.perf_counter()
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+        if fingerprint == self._fingerprint:
+            if self.metrics is not None:
+                self.metrics.record_request(round_trip, None)
+            return self._decoded
+        data = json_loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Invalid data structure received from API")
+        if data.get("code") != "10000":
+            raise ZeehoAuthError(f"API returned code {data.get('code')}: {data.get('msg')}")
+        if "data" not in data:
+            raise ValueError("Invalid data structure received from API")
+        if self._selection is not None and isinstance(data["data"], list):
+            # Prune right after decoding so only the selected vehicles and schema keys are kept
+            positions, projection = self._selection
+            data = {
+                "code": data["code"],
+                "data": [
+                    project(vehicle, projection) if position in positions and isinstance(vehicle, dict) else None
+                    for position, vehicle in enumerate(data["data"])
+                ],
+            }
+        self._fingerprint = fingerprint
+        self._decoded = data
+        if self.metrics is not None:
+            self.metrics.record_request(round_trip, time.perf_counter() - received)
+        return data
 
 class ZeehoVehicleUnlockClient(ZeehoAPIClient):
     API_PATH = "vehicleSet/network/unlock"
 
-    def __init__(self, authorization: str, appid: str, user_agent: str):
-        super().__init__(authorization, appid, user_agent)
+    def __init__(self, session: aiohttp.ClientSession, authorization: str, appid: str, user_agent: str,
+                 request_timeout: float = REQUEST_TIMEOUT, base_url: str = API_BASE_URL, breaker=None):
+        super().__init__(session, authorization, appid, user_agent, request_timeout, base_url, breaker=breaker)
 
     def get_headers(self) -> dict:
         headers = self.get_base_headers()
@@ -65,9 +197,10 @@ class ZeehoVehicleUnlockClient(ZeehoAPIClient):
         })
         return headers
 
-    def unlock_vehicle(self, secret: str) -> dict:
-        url = f"{API_BASE_URL}/{self.API_PATH}"
+    async def async_unlock_vehicle(self, secret: str) -> dict:
+        url = f"{self.base_url}/{self.API_PATH}"
         payload = {"secret": secret}
-        response = requests.post(url, headers=self.get_headers(), json=payload)
-        response.raise_for_status()
-        return response.json()
+        # Never retried: a lost response may still have unlocked the vehicle
+        return await self._async_request(
+            "POST", url, lambda body, _: json_loads(body) if body else {}, headers=self.get_headers(), json=payload
+        )
@@ -0,0 +1,118 @@
+"""Per-account circuit breaker with jittered exponential backoff."""
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Stop calling the ZEEHO API while it keeps failing.
+
+    ``failure_threshold`` consecutive failed calls open the circuit for a
+    jittered, exponentially growing delay (``base_delay`` doubling up to
+    ``max_delay``). After the delay one probe call is let through
+    (half-open): success closes the circuit, failure opens it again for
+    longer. Authentication failures open it for ``max_delay`` straight away,
+    as retrying with the same credentials cannot succeed.
+
+    Retries inside a call are limited by a budget: every call earns
+    ``retry_ratio`` tokens (up to ``max_retry_tokens``) and every retry
+    spends one, so retries stay a small share of the traffic.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_delay: float = 30, max_delay: float = 1800,
+                 retry_delay: float = 1, retry_ratio: float = 0.2, max_retry_tokens: float = 3):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.retry_ratio = retry_ratio
+        self.max_retry_tokens = max_retry_tokens
+        self.failures = 0
+        self.trips = 0
+        self.auth_failed = False
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._probing = False
+        self._retry_tokens = max_retry_tokens
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() >= self._open_until:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when calls may go through)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Return True if a call may go out now; half-open lets a single probe through."""
+        state = self.state
+        if state == CLOSED:
+            self._retry_tokens = min(self._retry_tokens + self.retry_ratio, self.max_retry_tokens)
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Give the half-open probe slot back when the probe ended without a result (e.g. cancelled)."""
+        self._probing = False
+
+    def acquire_retry(self, attempt: int):
+        """Return the jittered delay before retry ``attempt`` (0-based), or None if not allowed."""
+        if self._state != CLOSED or self._retry_tokens < 1:
+            return None
+        self._retry_tokens -= 1
+        return _jitter(self.retry_delay * 2 ** attempt)
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            _LOGGER.info("ZEEHO API reachable again; closing circuit for %s", self.name)
+        self._state = CLOSED
+        self._probing = False
+        self.failures = 0
+        self.trips = 0
+        self.auth_failed = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trip(_jitter(min(self.base_delay * 2 ** self.trips, self.max_delay)),
+                       f"{self.failures} consecutive errors")
+
+    def record_auth_failure(self) -> None:
+        self.failures += 1
+        self.auth_failed = True
+        self._trip(self.max_delay, "credentials rejected")
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "auth_failed": self.auth_failed,
+            "retry_after": round(self.retry_after(), 1),
+            "retry_tokens": round(self._retry_tokens, 2),
+        }
+
+    def _trip(self, delay: float, reason: str) -> None:
+        self.trips += 1
+        self._state = OPEN
+        self._probing = False
+        self._open_until = time.monotonic() + delay
+        _LOGGER.warning("ZEEHO API failing for %s (%s); pausing requests for %.0f s", self.name, reason, delay)
+
+def _jitter(delay: float) -> float:
+    """Equal jitter: keep half the delay, randomise the other half."""
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,93 @@
+"""Optimistic, coalesced vehicle commands."""
+import asyncio
+import logging
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .api import ZeehoApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+LOCK_KEY = "headLockState"
+UNLOCKED = "Unlocked"
+CONFIRM_DELAYS = (3, 10, 15)  # Seconds before each follow-up poll; at least the refresh cooldown apart
+
+class UnlockCommandQueue:
+    """Send unlock commands for one vehicle without duplicates or refresh storms.
+
+    The first request publishes the unlocked state optimistically and posts
+    the command. Requests arriving while that post is in flight share its
+    result, and requests arriving while the unlock awaits confirmation are
+    dropped, so a burst of taps or automations sends one command. After the
+    post, a few short-interval account polls confirm the new state; if none
+    does within ``CONFIRM_DELAYS`` the optimistic state is rolled back.
+    """
+
+    def __init__(self, coordinator, client):
+        self.coordinator = coordinator
+        self.client = client
+        self._inflight = None  # Future of the command being posted
+        self._confirm = None  # Task polling for confirmation
+
+    async def async_unlock(self, secret: str) -> None:
+        if self._inflight is not None:
+            _LOGGER.debug("Unlock already being sent for %s; waiting for it", self.coordinator.location_key)
+            await asyncio.shield(self._inflight)
+            return
+        if self._confirm is not None:
+            _LOGGER.debug("Unlock of %s awaiting confirmation; not sending another", self.coordinator.location_key)
+            return
+
+        future = self._inflight = self.coordinator.hass.loop.create_future()
+        self.coordinator.async_set_optimistic(LOCK_KEY, UNLOCKED)
+        try:
+            await self._async_send(secret)
+        except HomeAssistantError as error:
+            self.coordinator.async_rollback(LOCK_KEY)
+            future.set_exception(error)
+            future.exception()  # Waiters re-raise it; nobody else has to
+            raise
+        except asyncio.CancelledError:
+            self.coordinator.async_rollback(LOCK_KEY)
+            future.cancel()
+            raise
+        else:
+            future.set_result(None)
+            self._confirm = self.coordinator.hass.async_create_background_task(
+                self._async_confirm(), f"zeeho unlock confirmation {self.coordinator.location_key}"
+            )
+        finally:
+            self._inflight = None
+
+    def async_cancel(self) -> None:
+        """Stop waiting for confirmation, e.g. when the entity is removed."""
+        if self._confirm is not None:
+            self._confirm.cancel()
+            self._confirm = None
+
+    async def _async_send(self, secret: str) -> None:
+        try:
+            result = await self.client.async_unlock_vehicle(secret)
+        except ZeehoApiError as error:
+            raise HomeAssistantError(f"Unable to unlock the vehicle: {error}") from error
+        if isinstance(result, dict) and result.get("code", "10000") != "10000":
+            raise HomeAssistantError(f"Unable to unlock the vehicle: {result.get('msg') or result.get('code')}")
+
+    async def _async_confirm(self) -> None:
+        """Poll the account shortly after the command until the vehicle reports it."""
+        try:
+            for delay in CONFIRM_DELAYS:
+                await asyncio.sleep(delay)
+                if not self.coordinator.is_optimistic(LOCK_KEY):
+                    return  # Confirmed by a regular poll
+                await self.coordinator.account.async_request_refresh()
+                if not self.coordinator.is_optimistic(LOCK_KEY):
+                    _LOGGER.debug("Unlock of %s confirmed", self.coordinator.location_key)
+                    return
+            _LOGGER.warning(
+                "Unlock of %s not confirmed after %d s; restoring the reported lock state",
+                self.coordinator.location_key, sum(CONFIRM_DELAYS),
+            )
+            self.coordinator.async_rollback(LOCK_KEY)
+        finally:
+            self._confirm = None
@@ -4,13 +4,18 @@ from typing import Any, Dict, Optional
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig
 from homeassistant.helpers.dispatcher import callback
 
-from .api import ZeehoVehicleHomePageClient
-from .const import (CONF_ADDRESSAPI, CONF_ADDRESSAPI_KEY, CONF_ATTR_SHOW,
+from . import get_attr_tier
+from .api import ZeehoApiError, ZeehoVehicleHomePageClient
+from .const import (ATTR_TIERS, CONF_ADDRESSAPI, CONF_ADDRESSAPI_KEY, CONF_ATTR_SHOW,
                     CONF_GPS_CONVER, CONF_PRIVATE_KEY, CONF_SENSORS,
-                    CONF_UPDATE_INTERVAL, CONF_XUHAO, DOMAIN, KEY_BMSSOC,
+                    CONF_UPDATE_INTERVAL, CONF_MIN_INTERVAL, CONF_MAX_INTERVAL,
+                    DEFAULT_UPDATE_INTERVAL, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, CONF_XUHAO,
+                    CONF_HISTORY_CAPACITY, DEFAULT_HISTORY_CAPACITY, CONF_TRACK_TOLERANCE,
+                    DEFAULT_TRACK_TOLERANCE, DOMAIN, KEY_BMSSOC,
                     KEY_CHARGESTATE, KEY_LOCATIONTIME,
                     CONF_Appid, CONF_Authorization, CONF_Cfmoto_X_Sign,
                     CONF_NAME, CONF_Nonce, CONF_Signature, CONF_User_agent,
@@ -29,6 +34,7 @@ class ZeehoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             try:
                 vehicle_home_page_client = ZeehoVehicleHomePageClient(
+                    async_get_clientsession(self.hass),
                     user_input[CONF_Authorization],
                     user_input[CONF_Cfmoto_X_Sign],
                     user_input[CONF_Appid],
@@ -36,7 +42,7 @@ class ZeehoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     user_input[CONF_Signature],
                     user_input[CONF_User_agent]
                 )
-                redata = await self.hass.async_add_executor_job(vehicle_home_page_client.get_data)
+                redata = await vehicle_home_page_client.async_get_data()
 
                 if redata["code"] == "10000" and len(redata["data"]) > user_input[CONF_XUHAO]:
                     await self.async_set_unique_id(f"zeeho-{user_input[CONF_Cfmoto_X_Sign]}--{user_input[CONF_XUHAO]}".replace(".", "_"))
@@ -44,6 +50,9 @@ class ZeehoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     return self.async_create_entry(title=user_input[CONF_NAME], data=user_input)
                 else:
                     errors["base"] = "communication"
+            except ZeehoApiError as e:
+                _LOGGER.error("Error validating input: %s", e)
+                errors["base"] = "communication"
             except Exception as e:
                 _LOGGER.error(f"Error validating input: {str(e)}")
                 errors["base"] = "unknown"
@@ -73,27 +82,46 @@ class ZeehoOptionsFlow(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
+        errors: Dict[str, str] = {}
+        options = self.config_entry.options
+
         if user_input is not None:
+            base = user_input.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+            if not (user_input.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL) <= base
+                    <= user_input.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)):
+                errors["base"] = "intervals"
+                # Show the form again with what was entered
+                options = {**options, **user_input}
             # Ensure that CONF_SECRET is included in the saved options
-            if CONF_SECRET in user_input:
+            elif CONF_SECRET in user_input:
                 return self.async_create_entry(title="", data=user_input)
 
-        options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
                 vol.Optional(
                     CONF_UPDATE_INTERVAL,
-                    default=options.get(CONF_UPDATE_INTERVAL, 60),
+                    default=options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                vol.Optional(
+                    CONF_MIN_INTERVAL,
+                    default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
                 ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                vol.Optional(
+                    CONF_MAX_INTERVAL,
+                    default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=86400)),
                 vol.Optional(
                     CONF_GPS_CONVER,
                     default=options.get(CONF_GPS_CONVER, True),
                 ): bool,
                 vol.Optional(
                     CONF_ATTR_SHOW,
-                    default=options.get(CONF_ATTR_SHOW, True),
-                ): bool,
+                    default=get_attr_tier(options),
+                ): SelectSelector(
+                    SelectSelectorConfig(options=list(ATTR_TIERS),
+                                         multiple=False,
+                                         translation_key=CONF_ATTR_SHOW)),
                 vol.Optional(CONF_SENSORS,
                              default=options.get(CONF_SENSORS, [])):
                 SelectSelector(
@@ -136,9 +164,18 @@ class ZeehoOptionsFlow(config_entries.OptionsFlow):
                 vol.Optional(CONF_PRIVATE_KEY,
                              default=options.get(CONF_PRIVATE_KEY, "")):
                 str,
+                vol.Optional(
+                    CONF_HISTORY_CAPACITY,
+                    default=options.get(CONF_HISTORY_CAPACITY, DEFAULT_HISTORY_CAPACITY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=100, max=1000000)),
+                vol.Optional(
+                    CONF_TRACK_TOLERANCE,
+                    default=options.get(CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
                 vol.Optional(
                     CONF_SECRET,
                     default=options.get(CONF_SECRET, "")
                 ): str,
             }),
+            errors=errors
         )
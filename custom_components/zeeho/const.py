@@ -28,6 +28,7 @@ If you have any issues with this you need to open an issue here:
 
 # API URLs and paths
 API_BASE_URL = "https://tapi.zeehoev.com/v1.0/app/cfmotoserverapp"
+REQUEST_TIMEOUT = 10  # Seconds per HTTP request
 
 # Import constants from Home Assistant
 
@@ -44,6 +45,8 @@ CONF_XUHAO = "xuhao"
 CONF_GPS_CONVER = "gps_conver"
 CONF_ATTR_SHOW = "attr_show"
 CONF_UPDATE_INTERVAL = "update_interval_seconds"
+CONF_MIN_INTERVAL = "min_update_interval_seconds"
+CONF_MAX_INTERVAL = "max_update_interval_seconds"
 CONF_SENSORS = "sensors"
 CONF_MAP_GCJ_LAT = "map_gcj_lat"
 CONF_MAP_GCJ_LNG = "map_gcj_lng"
@@ -52,10 +55,33 @@ CONF_MAP_BD_LNG = "map_bd_lng"
 CONF_ADDRESSAPI = "addressapi"
 CONF_ADDRESSAPI_KEY = "api_key"
 CONF_PRIVATE_KEY = "private_key"
+CONF_HISTORY_CAPACITY = "history_capacity"
+CONF_TRACK_TOLERANCE = "track_tolerance"
+
+# Polling defaults (seconds)
+DEFAULT_UPDATE_INTERVAL = 90
+DEFAULT_MIN_INTERVAL = 30
+DEFAULT_MAX_INTERVAL = 900
+
+# Attribute tiers (CONF_ATTR_SHOW); older entries stored a bool: True is full, False is none
+ATTR_TIER_NONE = "none"
+ATTR_TIER_ESSENTIAL = "essential"
+ATTR_TIER_FULL = "full"
+ATTR_TIERS = (ATTR_TIER_NONE, ATTR_TIER_ESSENTIAL, ATTR_TIER_FULL)
+DEFAULT_ATTR_TIER = ATTR_TIER_FULL
+
+# Track history defaults
+DEFAULT_HISTORY_CAPACITY = 20000  # Records per vehicle (32 bytes each)
+DEFAULT_TRACK_TOLERANCE = 5  # Metres a merged-away point may lie off the stored track (0 keeps every point)
 
 # Coordinator and listener constants
 COORDINATOR = "coordinator"
+ACCOUNTS = "accounts"
+ADDRESS_CACHE = "address_cache"
 UNDO_UPDATE_LISTENER = "undo_update_listener"
+CREDENTIALS = "credentials"
+SCHEDULER = "scheduler"
+GEOFENCES = "geofences"
 
 # Attribute constants
 ATTR_ICON = "icon"
@@ -7,11 +7,15 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.device_tracker import SourceType
 from homeassistant.const import (
     CONF_NAME,
+    STATE_HOME,
+    STATE_NOT_HOME,
 )
 from .const import (
+    ATTR_TIER_NONE,
     COORDINATOR,
     DOMAIN, 
 )
+from . import get_device_info
 from homeassistant.helpers.entity import DeviceInfo
 
 PARALLEL_UPDATES = 1
@@ -26,7 +30,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
 class ZeehoDeviceTracker(CoordinatorEntity, TrackerEntity):
     def __init__(self, coordinator, config_entry):
-        super().__init__(coordinator)
+        super().__init__(coordinator, frozenset({"thislat", "thislon", "bmssoc", "geofences"}))
         self._config_entry = config_entry
         self._attr_unique_id = f"{config_entry.entry_id}_tracker"
         self._attr_name = f"{config_entry.data.get(CONF_NAME, DOMAIN)} Tracker"
@@ -40,6 +44,31 @@ class ZeehoDeviceTracker(CoordinatorEntity, TrackerEntity):
     def longitude(self):
         return self.coordinator.data.get("thislon")
 
+    @property
+    def location_name(self):
+        """Zone from the integration's own GCJ02 geofence match.
+
+        Home Assistant's generic zone scan compares WGS84 zones with whatever
+        coordinates the entity reports, so it is bypassed whenever the
+        geofence index can answer.
+        """
+        manager = self.coordinator.geofence_manager
+        if manager is None or self.coordinator.data.get("latitude") is None:
+            return None
+        zones = [manager.index.get(fence_id) for fence_id in self.coordinator.geofences]
+        zones = [fence for fence in zones if fence is not None and fence.is_zone]
+        if not zones:
+            return STATE_NOT_HOME
+        zone = min(zones, key=lambda fence: fence.radius)
+        return STATE_HOME if zone.fence_id == "zone.home" else zone.name
+
+    @property
+    def extra_state_attributes(self):
+        manager = self.coordinator.geofence_manager
+        if manager is None or self.coordinator.attr_tier == ATTR_TIER_NONE:
+            return None
+        return {"geofences": sorted(manager.name(fence_id) for fence_id in self.coordinator.geofences)}
+
     @property
     def source_type(self):
         return SourceType.GPS
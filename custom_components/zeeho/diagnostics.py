@@ -0,0 +1,54 @@
+"""Diagnostics support for ZEEHO EV."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    COORDINATOR, DOMAIN, CONF_ADDRESSAPI_KEY, CONF_Appid, CONF_Authorization,
+    CONF_Cfmoto_X_Sign, CONF_Nonce, CONF_PRIVATE_KEY, CONF_SECRET, CONF_Signature,
+)
+
+TO_REDACT = {
+    CONF_Authorization, CONF_Cfmoto_X_Sign, CONF_Appid, CONF_Nonce, CONF_Signature,
+    CONF_SECRET, CONF_ADDRESSAPI_KEY, CONF_PRIVATE_KEY,
+    "unique_id", "location_key", "vinNo", "deviceName", "latitude", "longitude", "address",
+    "raw_latitude", "raw_longitude", "thislat", "thislon", "map_gcj_lat", "map_gcj_lng", "map_bd_lat", "map_bd_lng",
+}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return coordinator state and performance metrics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATOR]
+    account = coordinator.account
+    data = coordinator.data
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "polling": {
+            "account_interval": account.poll_interval.total_seconds(),
+            "next_poll_delay": account.update_interval.total_seconds(),
+            "account_priority": account.priority,
+            "desired_interval": coordinator.desired_interval.total_seconds(),
+            "base_interval": coordinator.base_interval.total_seconds(),
+            "min_interval": coordinator.min_interval.total_seconds(),
+            "max_interval": coordinator.max_interval.total_seconds(),
+            "vehicles_on_account": len(account.vehicles),
+            "last_update_success": coordinator.last_update_success,
+            "stale": coordinator.stale,
+        },
+        "scheduler": account.scheduler.as_dict() if account.scheduler else None,
+        "circuit_breaker": account.breaker.as_dict(),
+        "account_metrics": account.metrics.as_dict(),
+        "vehicle_metrics": coordinator.metrics.as_dict(),
+        "geofences": {
+            "indexed": len(coordinator.geofence_manager.index) if coordinator.geofence_manager else 0,
+            "inside": sorted(coordinator.geofences),
+        },
+        "trips": {
+            "active": coordinator.trips.active,
+            "count": coordinator.trips.trip_count,
+            "last_trip": coordinator.trips.last_trip.as_dict() if coordinator.trips.last_trip else None,
+        },
+        "position_filter": coordinator.position_filter.as_dict(),
+        "track_points": coordinator.track_store.count if coordinator.track_store else 0,
+        "track_points_merged": coordinator.track_simplifier.merged,
+        "data": async_redact_data(data.as_dict(), TO_REDACT) if data else None,
+    }
@@ -0,0 +1,240 @@
+"""Reverse geocoding with a geohash-keyed, persisted address cache."""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import quote, quote_plus, urlencode
+
+import aiohttp
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, REQUEST_TIMEOUT
+from .utils import gcj02towgs84_exact
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}_address_cache"
+STORAGE_VERSION = 1
+SAVE_DELAY = 60  # Seconds to batch cache writes
+
+GEOHASH_PRECISION = 7  # ~150 m x 150 m cells
+CACHE_SIZE = 4096
+CACHE_TTL = 30 * 24 * 3600  # Seconds an address stays valid
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a point as a geohash string."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = bits * 2 + 1
+                lng_lo = mid
+            else:
+                bits *= 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = bits * 2 + 1
+                lat_lo = mid
+            else:
+                bits *= 2
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+class ReverseGeocoder:
+    """Base class for reverse geocoding providers.
+
+    Providers take GCJ02 coordinates, the datum reported by the ZEEHO API.
+    """
+
+    URL = ""
+
+    def __init__(self, session: aiohttp.ClientSession, api_key: str = "", private_key: str = ""):
+        self.session = session
+        self.api_key = api_key
+        self.private_key = private_key
+        self.timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    async def async_reverse(self, lng: float, lat: float) -> Optional[str]:
+        raise NotImplementedError
+
+    async def _async_get_json(self, params: dict, headers: Optional[dict] = None) -> dict:
+        async with self.session.get(self.URL, params=params, headers=headers, timeout=self.timeout) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+class FreeGeocoder(ReverseGeocoder):
+    """OpenStreetMap Nominatim; no key required, expects WGS84."""
+
+    URL = "https://nominatim.openstreetmap.org/reverse"
+
+    async def async_reverse(self, lng, lat):
+        lng, lat = gcj02towgs84_exact(lng, lat)
+        data = await self._async_get_json(
+            {"format": "jsonv2", "lat": f"{lat:.6f}", "lon": f"{lng:.6f}", "accept-language": "zh-CN"},
+            headers={"User-Agent": "ha-zeeho-ev"},
+        )
+        return data.get("display_name")
+
+class GaodeGeocoder(ReverseGeocoder):
+    """Amap web service regeo API."""
+
+    URL = "https://restapi.amap.com/v3/geocode/regeo"
+
+    async def async_reverse(self, lng, lat):
+        params = {"key": self.api_key, "location": f"{lng:.6f},{lat:.6f}", "output": "json"}
+        if self.private_key:
+            raw = "&".join(f"{k}={params[k]}" for k in sorted(params)) + self.private_key
+            params["sig"] = hashlib.md5(raw.encode()).hexdigest()
+        data = await self._async_get_json(params)
+        if data.get("status") != "1":
+            raise ValueError(f"Gaode error: {data.get('info')}")
+        address = data.get("regeocode", {}).get("formatted_address")
+        return address or None
+
+class BaiduGeocoder(ReverseGeocoder):
+    """Baidu reverse_geocoding v3 API."""
+
+    PATH = "/reverse_geocoding/v3/"
+    URL = f"https://api.map.baidu.com{PATH}"
+
+    async def async_reverse(self, lng, lat):
+        params = {"ak": self.api_key, "output": "json", "coordtype": "gcj02ll", "location": f"{lat:.6f},{lng:.6f}"}
+        if self.private_key:
+            query = quote(f"{self.PATH}?{urlencode(params)}", safe="/:=&?#+!$,;'@()*[]")
+            params["sn"] = hashlib.md5(quote_plus(query + self.private_key).encode()).hexdigest()
+        data = await self._async_get_json(params)
+        if data.get("status") != 0:
+            raise ValueError(f"Baidu error: {data.get('message') or data.get('status')}")
+        return data.get("result", {}).get("formatted_address") or None
+
+class TencentGeocoder(ReverseGeocoder):
+    """Tencent WebService geocoder API."""
+
+    PATH = "/ws/geocoder/v1/"
+    URL = f"https://apis.map.qq.com{PATH}"
+
+    async def async_reverse(self, lng, lat):
+        params = {"key": self.api_key, "location": f"{lat:.6f},{lng:.6f}"}
+        if self.private_key:
+            raw = f"{self.PATH}?" + "&".join(f"{k}={params[k]}" for k in sorted(params)) + self.private_key
+            params["sig"] = hashlib.md5(raw.encode()).hexdigest()
+        data = await self._async_get_json(params)
+        if data.get("status") != 0:
+            raise ValueError(f"Tencent error: {data.get('message')}")
+        return data.get("result", {}).get("address") or None
+
+PROVIDERS = {
+    "free": FreeGeocoder,
+    "gaode": GaodeGeocoder,
+    "baidu": BaiduGeocoder,
+    "tencent": TencentGeocoder,
+}
+
+class AddressCache:
+    """LRU address cache keyed by provider and geohash cell, persisted via ``Store``."""
+
+    def __init__(self, hass, size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.hass = hass
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (address, timestamp)
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        now = time.time()
+        for key, address, timestamp in stored.get("entries", []):
+            if now - timestamp < self.ttl:
+                self._entries[key] = (address, timestamp)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        address, timestamp = entry
+        if time.time() - timestamp >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return address
+
+    def set(self, key: str, address: str) -> None:
+        self._entries[key] = (address, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {"entries": [[key, address, timestamp] for key, (address, timestamp) in self._entries.items()]}
+
+class AddressResolver:
+    """Resolve vehicle addresses through the cache, querying the provider in the background."""
+
+    def __init__(self, hass, entry, cache: AddressCache, provider_name: str, geocoder: ReverseGeocoder):
+        self.hass = hass
+        self.entry = entry  # Lookups run as the entry's background tasks, cancelled on unload
+        self.cache = cache
+        self.provider_name = provider_name
+        self.geocoder = geocoder
+        self._pending = set()
+
+    def cache_key(self, lng: float, lat: float) -> str:
+        return f"{self.provider_name}:{geohash_encode(lat, lng)}"
+
+    def lookup(self, lng: float, lat: float, on_result) -> Optional[str]:
+        """Return a cached address, or schedule a lookup and call ``on_result(key, address)`` later."""
+        key = self.cache_key(lng, lat)
+        address = self.cache.get(key)
+        if address is not None or key in self._pending:
+            return address
+        self._pending.add(key)
+        self.entry.async_create_background_task(
+            self.hass, self._async_resolve(key, lng, lat, on_result), f"{DOMAIN} reverse geocode {key}"
+        )
+        return None
+
+    async def _async_resolve(self, key, lng, lat, on_result):
+        try:
+            address = await self.geocoder.async_reverse(lng, lat)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+            _LOGGER.warning("Reverse geocoding via %s failed: %s", self.provider_name, error)
+            return
+        finally:
+            self._pending.discard(key)
+        if address:
+            self.cache.set(key, address)
+            on_result(key, address)
+
+def create_resolver(hass, entry, session, cache, provider_name, api_key, private_key) -> Optional[AddressResolver]:
+    """Build a resolver for the configured provider, or None when disabled."""
+    provider = PROVIDERS.get(provider_name)
+    if provider is None:
+        return None
+    if provider_name != "free" and not api_key:
+        _LOGGER.debug("No API key for %s reverse geocoding; addresses disabled", provider_name)
+        return None
+    return AddressResolver(hass, entry, cache, provider_name, provider(session, api_key, private_key))
@@ -0,0 +1,319 @@
+"""Circle and polygon geofences in a grid index, with hysteresis."""
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ID, ATTR_LATITUDE, ATTR_LONGITUDE, ATTR_NAME, CONF_RADIUS
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import TrackStates, async_track_state_change_filtered
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .utils import (DATUM_WGS84, DATUMS, haversine, metres_to_degrees,
+                    segment_distance, to_gcj02)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}_geofences"
+STORAGE_VERSION = 1
+
+EVENT_GEOFENCE = f"{DOMAIN}_geofence"
+SIGNAL_GEOFENCES_UPDATED = f"{DOMAIN}_geofences_updated"
+
+GRID_SIZE = 0.05  # Degrees per index cell, about 5 km
+MAX_CELLS = 256  # Fences spanning more cells are checked on every lookup instead
+HYSTERESIS = 50  # Metres a vehicle must be outside a fence before it leaves
+
+ZONE_DOMAIN = "zone"
+ZONE_PREFIX = f"{ZONE_DOMAIN}."
+
+SERVICE_ADD_GEOFENCE = "add_geofence"
+SERVICE_REMOVE_GEOFENCE = "remove_geofence"
+ATTR_POINTS = "points"
+ATTR_DATUM = "datum"
+
+class Fence(NamedTuple):
+    """A fence in GCJ02, the datum of the vehicle positions.
+
+    A circle has a single point and a radius in metres; a polygon has three
+    or more points and no radius. Points are ``(lng, lat)`` pairs.
+    """
+
+    fence_id: str
+    name: str
+    points: Tuple[Tuple[float, float], ...]
+    radius: float
+    bbox: Tuple[float, float, float, float]  # min_lng, min_lat, max_lng, max_lat
+
+    @property
+    def is_zone(self) -> bool:
+        return self.fence_id.startswith(ZONE_PREFIX)
+
+    def distance_outside(self, lng: float, lat: float) -> float:
+        """Return how many metres the point lies outside the fence (0 when inside)."""
+        if self.radius:
+            center_lng, center_lat = self.points[0]
+            return max(haversine(center_lng, center_lat, lng, lat) - self.radius, 0.0)
+        if _point_in_polygon(lng, lat, self.points):
+            return 0.0
+        points = self.points
+        return min(
+            segment_distance(lng, lat, *points[i - 1], *points[i])
+            for i in range(len(points))
+        )
+
+def make_circle(fence_id: str, name: str, lng: float, lat: float, radius: float,
+                datum: str = DATUM_WGS84) -> Fence:
+    """Build a circular fence from a center given in ``datum``."""
+    if radius <= 0:
+        raise ValueError("Geofence radius must be positive")
+    lng, lat = to_gcj02(lng, lat, datum)
+    dlng, dlat = metres_to_degrees(radius, lat)
+    return Fence(fence_id, name, ((lng, lat),), float(radius),
+                 (lng - dlng, lat - dlat, lng + dlng, lat + dlat))
+
+def make_polygon(fence_id: str, name: str, points: Sequence[Tuple[float, float]],
+                 datum: str = DATUM_WGS84) -> Fence:
+    """Build a polygon fence from ``(lng, lat)`` vertices given in ``datum``."""
+    points = tuple(tuple(to_gcj02(lng, lat, datum)) for lng, lat in points)
+    if len(points) < 3:
+        raise ValueError("A geofence polygon needs at least three points")
+    lngs = [lng for lng, _ in points]
+    lats = [lat for _, lat in points]
+    return Fence(fence_id, name, points, 0.0, (min(lngs), min(lats), max(lngs), max(lats)))
+
+def _point_in_polygon(lng: float, lat: float, points) -> bool:
+    """Even-odd ray casting; fences are small enough to treat degrees as planar."""
+    inside = False
+    previous_lng, previous_lat = points[-1]
+    for point_lng, point_lat in points:
+        if (point_lat > lat) != (previous_lat > lat):
+            crossing = point_lng + (lat - point_lat) * (previous_lng - point_lng) / (previous_lat - point_lat)
+            if lng < crossing:
+                inside = not inside
+        previous_lng, previous_lat = point_lng, point_lat
+    return inside
+
+class GeofenceIndex:
+    """Uniform grid over fence bounding boxes.
+
+    Each fence is registered in every ``cell_size`` cell its bounding box,
+    grown by the hysteresis margin, touches. A lookup reads one cell and
+    tests only the fences listed there, so its cost depends on how many
+    fences overlap that spot rather than on the total number of fences.
+    Very large fences would fill too many cells and are kept in a short list
+    that every lookup checks.
+    """
+
+    def __init__(self, cell_size: float = GRID_SIZE, margin: float = HYSTERESIS):
+        self.cell_size = cell_size
+        self.margin = margin
+        self._fences: Dict[str, Fence] = {}
+        self._cells = defaultdict(set)  # (column, row) -> fence ids
+        self._large = set()
+
+    def __len__(self) -> int:
+        return len(self._fences)
+
+    def __contains__(self, fence_id) -> bool:
+        return fence_id in self._fences
+
+    def get(self, fence_id: str) -> Optional[Fence]:
+        return self._fences.get(fence_id)
+
+    def fences(self) -> Iterable[Fence]:
+        return self._fences.values()
+
+    def add(self, fence: Fence) -> None:
+        """Insert a fence, replacing any fence with the same id."""
+        self.remove(fence.fence_id)
+        self._fences[fence.fence_id] = fence
+        cells = self._cells_for(fence)
+        if cells is None:
+            self._large.add(fence.fence_id)
+            return
+        for cell in cells:
+            self._cells[cell].add(fence.fence_id)
+
+    def remove(self, fence_id: str) -> Optional[Fence]:
+        fence = self._fences.pop(fence_id, None)
+        if fence is None:
+            return None
+        if fence_id in self._large:
+            self._large.discard(fence_id)
+            return fence
+        for cell in self._cells_for(fence):
+            ids = self._cells[cell]
+            ids.discard(fence_id)
+            if not ids:
+                del self._cells[cell]
+        return fence
+
+    def inside(self, lng: float, lat: float, current: FrozenSet[str] = frozenset()) -> FrozenSet[str]:
+        """Return the ids of the fences containing a GCJ02 point.
+
+        Fences in ``current`` (the previous result) are kept until the point
+        is more than the margin outside them, so a position jittering on a
+        boundary does not flap between enter and exit.
+        """
+        cell = (math.floor(lng / self.cell_size), math.floor(lat / self.cell_size))
+        inside = set()
+        for candidates in (self._cells.get(cell, ()), self._large):
+            for fence_id in candidates:
+                distance = self._fences[fence_id].distance_outside(lng, lat)
+                if distance == 0 or (fence_id in current and distance <= self.margin):
+                    inside.add(fence_id)
+        return frozenset(inside)
+
+    def _cells_for(self, fence: Fence):
+        """Return the grid cells under the grown bounding box, or None if there are too many."""
+        min_lng, min_lat, max_lng, max_lat = fence.bbox
+        dlng, dlat = metres_to_degrees(self.margin, max(abs(min_lat), abs(max_lat)))
+        columns = range(math.floor((min_lng - dlng) / self.cell_size), math.floor((max_lng + dlng) / self.cell_size) + 1)
+        rows = range(math.floor((min_lat - dlat) / self.cell_size), math.floor((max_lat + dlat) / self.cell_size) + 1)
+        if len(columns) * len(rows) > MAX_CELLS:
+            return None
+        return [(column, row) for column in columns for row in rows]
+
+ADD_GEOFENCE_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Required(ATTR_ID): cv.string,
+        vol.Optional(ATTR_NAME): cv.string,
+        vol.Inclusive(ATTR_LATITUDE, "circle"): cv.latitude,
+        vol.Inclusive(ATTR_LONGITUDE, "circle"): cv.longitude,
+        vol.Inclusive(CONF_RADIUS, "circle"): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(ATTR_POINTS): vol.All(
+            [vol.ExactSequence([cv.latitude, cv.longitude])], vol.Length(min=3)
+        ),
+        vol.Optional(ATTR_DATUM, default=DATUM_WGS84): vol.In(DATUMS),
+    }),
+    cv.has_at_least_one_key(ATTR_LATITUDE, ATTR_POINTS),
+)
+
+REMOVE_GEOFENCE_SCHEMA = vol.Schema({vol.Required(ATTR_ID): cv.string})
+
+class GeofenceManager:
+    """All geofences of the integration, shared by every vehicle.
+
+    User fences are added through services and persisted with their datum;
+    Home Assistant zones (WGS84 circles) are mirrored as ``zone.*`` fences and
+    follow zone changes. Vehicle coordinators are told through
+    ``SIGNAL_GEOFENCES_UPDATED`` when the set of fences changes.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self.index = GeofenceIndex()
+        self._definitions = {}  # User fence id -> stored definition
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        for definition in (stored or {}).get("fences", []):
+            try:
+                self.index.add(_fence_from_definition(definition))
+            except (KeyError, TypeError, ValueError) as error:
+                _LOGGER.warning("Ignoring stored geofence %s: %s", definition.get(ATTR_ID), error)
+                continue
+            self._definitions[definition[ATTR_ID]] = definition
+        for state in self.hass.states.async_all(ZONE_DOMAIN):
+            self._sync_zone(state.entity_id, state)
+        async_track_state_change_filtered(
+            self.hass, TrackStates(False, set(), {ZONE_DOMAIN}), self._handle_zone_change
+        )
+
+    @callback
+    def async_register_services(self) -> None:
+        self.hass.services.async_register(
+            DOMAIN, SERVICE_ADD_GEOFENCE, self._async_handle_add, schema=ADD_GEOFENCE_SCHEMA
+        )
+        self.hass.services.async_register(
+            DOMAIN, SERVICE_REMOVE_GEOFENCE, self._async_handle_remove, schema=REMOVE_GEOFENCE_SCHEMA
+        )
+
+    def name(self, fence_id: str) -> str:
+        fence = self.index.get(fence_id)
+        return fence.name if fence is not None else fence_id
+
+    async def _async_handle_add(self, call: ServiceCall) -> None:
+        fence_id = call.data[ATTR_ID]
+        if fence_id.startswith(ZONE_PREFIX):
+            raise HomeAssistantError(f"{fence_id} mirrors a Home Assistant zone; edit the zone instead")
+        definition = {
+            ATTR_ID: fence_id,
+            ATTR_NAME: call.data.get(ATTR_NAME, fence_id),
+            ATTR_DATUM: call.data[ATTR_DATUM],
+        }
+        if ATTR_POINTS in call.data:
+            definition[ATTR_POINTS] = [[lat, lng] for lat, lng in call.data[ATTR_POINTS]]
+        else:
+            definition[ATTR_LATITUDE] = call.data[ATTR_LATITUDE]
+            definition[ATTR_LONGITUDE] = call.data[ATTR_LONGITUDE]
+            definition[CONF_RADIUS] = call.data[CONF_RADIUS]
+        try:
+            fence = _fence_from_definition(definition)
+        except ValueError as error:
+            raise HomeAssistantError(f"Invalid geofence {fence_id}: {error}") from error
+        self.index.add(fence)
+        self._definitions[fence_id] = definition
+        self._async_changed(save=True)
+
+    async def _async_handle_remove(self, call: ServiceCall) -> None:
+        fence_id = call.data[ATTR_ID]
+        if fence_id not in self._definitions:
+            raise HomeAssistantError(f"No geofence {fence_id}")
+        del self._definitions[fence_id]
+        self.index.remove(fence_id)
+        self._async_changed(save=True)
+
+    @callback
+    def _handle_zone_change(self, event) -> None:
+        self._sync_zone(event.data["entity_id"], event.data["new_state"])
+        self._async_changed()
+
+    def _sync_zone(self, entity_id: str, state) -> None:
+        """Mirror one zone into the index; passive and removed zones are dropped."""
+        attributes = state.attributes if state is not None else {}
+        if state is None or attributes.get("passive") or ATTR_LATITUDE not in attributes:
+            self.index.remove(entity_id)
+            return
+        try:
+            fence = make_circle(
+                entity_id,
+                attributes.get("friendly_name", entity_id),
+                float(attributes[ATTR_LONGITUDE]),
+                float(attributes[ATTR_LATITUDE]),
+                float(attributes.get(CONF_RADIUS, 0)),
+                DATUM_WGS84,
+            )
+        except (KeyError, TypeError, ValueError):
+            self.index.remove(entity_id)
+            return
+        self.index.add(fence)
+
+    @callback
+    def _async_changed(self, save: bool = False) -> None:
+        if save:
+            self._store.async_delay_save(self._data_to_save, 1)
+        async_dispatcher_send(self.hass, SIGNAL_GEOFENCES_UPDATED)
+
+    def _data_to_save(self) -> dict:
+        return {"fences": list(self._definitions.values())}
+
+def _fence_from_definition(definition: dict) -> Fence:
+    datum = definition.get(ATTR_DATUM, DATUM_WGS84)
+    if ATTR_POINTS in definition:
+        return make_polygon(
+            definition[ATTR_ID], definition[ATTR_NAME],
+            [(lng, lat) for lat, lng in definition[ATTR_POINTS]], datum,
+        )
+    return make_circle(
+        definition[ATTR_ID], definition[ATTR_NAME],
+        definition[ATTR_LONGITUDE], definition[ATTR_LATITUDE], definition[CONF_RADIUS], datum,
+    )
@@ -0,0 +1,228 @@
+"""Per-vehicle track history in a memory-mapped ring file."""
+import logging
+import mmap
+import os
+import struct
+from typing import List, NamedTuple, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+RIDE_STATES = {"Offline": 0, "Online": 1}
+RIDE_STATE_NAMES = {value: key for key, value in RIDE_STATES.items()}
+
+class TrackPoint(NamedTuple):
+    timestamp: float  # Epoch seconds
+    latitude: float
+    longitude: float
+    soc: Optional[int]
+    odometer: Optional[float]
+    ride_state: str
+
+class TrackStore:
+    """Append-only ring of fixed-width track records backed by ``mmap``.
+
+    The file is a 64 byte header followed by ``capacity`` 32 byte records.
+    Once full, the oldest record is overwritten. Records are kept in
+    timestamp order, so time window queries are a binary search.
+    Blocking file operations (``open``/``close``) belong in the executor;
+    appends and queries only touch the mapping.
+    """
+
+    MAGIC = b"ZTRK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHIQQ")  # magic, version, record size, capacity, head, count
+    HEADER_SIZE = 64
+    RECORD = struct.Struct("<dddfhBx")  # timestamp, lat, lon, odometer, soc, ride state
+    NO_SOC = -1
+
+    def __init__(self, path: str, capacity: int):
+        if capacity < 1:
+            raise ValueError("Track capacity must be positive")
+        self.path = path
+        self.capacity = capacity
+        self._file = None
+        self._map = None
+        self._head = 0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def open(self) -> None:
+        """Map the ring file, creating it or rewriting it at a new capacity."""
+        header = self._read_header()
+        points = []
+        if header is not None and header[3] != self.capacity:
+            points = self._read_all(header)
+            header = None
+
+        size = self.HEADER_SIZE + self.capacity * self.RECORD.size
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "r+b" if header is not None else "w+b")
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        if header is not None:
+            self._head = header[4] % self.capacity
+            self._count = min(header[5], self.capacity)
+            return
+        self._head = 0
+        self._count = 0
+        self._write_header()
+        for point in points[-self.capacity:]:
+            self.append(point)
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity in place, keeping the newest records."""
+        if capacity < 1:
+            raise ValueError("Track capacity must be positive")
+        self.close()
+        self.capacity = capacity
+        self.open()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, point: TrackPoint) -> bool:
+        """Write a record; returns False if it is older than the newest record."""
+        latest = self.latest()
+        if latest is not None and point.timestamp < latest.timestamp:
+            _LOGGER.debug("Dropping out-of-order track point at %s", point.timestamp)
+            return False
+        self.RECORD.pack_into(
+            self._map,
+            self._offset(self._head),
+            point.timestamp,
+            point.latitude,
+            point.longitude,
+            point.odometer if point.odometer is not None else float("nan"),
+            point.soc if point.soc is not None else self.NO_SOC,
+            RIDE_STATES.get(point.ride_state, 0),
+        )
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self._write_header()
+        return True
+
+    def append_if_changed(self, point: TrackPoint) -> bool:
+        """Append unless position, SOC, odometer and ride state match the newest record."""
+        if self.repeats(point):
+            return False
+        return self.append(point)
+
+    def repeats(self, point: TrackPoint) -> bool:
+        """Return True if position, SOC, odometer and ride state match the newest record."""
+        latest = self.latest()
+        return (
+            latest is not None
+            and latest.latitude == point.latitude
+            and latest.longitude == point.longitude
+            and latest.soc == point.soc
+            and latest.ride_state == point.ride_state
+            and (latest.odometer is None) == (point.odometer is None)
+            and (point.odometer is None or abs(latest.odometer - point.odometer) < 0.01)
+        )
+
+    def replace_latest(self, point: TrackPoint) -> bool:
+        """Overwrite the newest record; returns False if that would break timestamp order."""
+        if self._count < 2 or point.timestamp < self._timestamp(self._count - 2):
+            return False
+        self._head = (self._head - 1) % self.capacity
+        self._count -= 1
+        return self.append(point)
+
+    def latest(self) -> Optional[TrackPoint]:
+        if not self._count:
+            return None
+        return self._read(self._count - 1)
+
+    def oldest(self) -> Optional[TrackPoint]:
+        if not self._count:
+            return None
+        return self._read(0)
+
+    def latest_before(self, timestamp: float) -> Optional[TrackPoint]:
+        """Return the newest record with ``timestamp`` strictly before the given one."""
+        index = self._bisect(timestamp)
+        return self._read(index - 1) if index else None
+
+    def query(self, start: float, end: float) -> List[TrackPoint]:
+        """Return records with ``start <= timestamp <= end``, oldest first."""
+        first = self._bisect(start)
+        points = []
+        for index in range(first, self._count):
+            point = self._read(index)
+            if point.timestamp > end:
+                break
+            points.append(point)
+        return points
+
+    def _bisect(self, timestamp: float) -> int:
+        """First logical index whose timestamp is >= the given one."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _physical(self, index: int) -> int:
+        """Map a logical index (0 = oldest) to a slot in the ring."""
+        return (self._head - self._count + index) % self.capacity
+
+    def _offset(self, slot: int) -> int:
+        return self.HEADER_SIZE + slot * self.RECORD.size
+
+    def _timestamp(self, index: int) -> float:
+        return struct.unpack_from("<d", self._map, self._offset(self._physical(index)))[0]
+
+    def _read(self, index: int) -> TrackPoint:
+        timestamp, lat, lon, odometer, soc, ride_state = self.RECORD.unpack_from(
+            self._map, self._offset(self._physical(index))
+        )
+        return TrackPoint(
+            timestamp,
+            lat,
+            lon,
+            None if soc == self.NO_SOC else soc,
+            None if odometer != odometer else odometer,
+            RIDE_STATE_NAMES.get(ride_state, "Offline"),
+        )
+
+    def _write_header(self) -> None:
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, self.VERSION, self.RECORD.size,
+                              self.capacity, self._head, self._count)
+
+    def _read_header(self) -> Optional[tuple]:
+        """Return the header of a readable existing file, else None."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            header = file.read(self.HEADER.size)
+        if len(header) < self.HEADER.size:
+            return None
+        header = self.HEADER.unpack(header)
+        magic, version, record_size = header[:3]
+        if magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD.size:
+            _LOGGER.warning("Discarding unreadable track file %s", self.path)
+            return None
+        return header
+
+    def _read_all(self, header: tuple) -> List[TrackPoint]:
+        """Read every record of a file written with a different capacity."""
+        capacity, head, count = header[3:]
+        with open(self.path, "rb") as file:
+            data = file.read(self.HEADER_SIZE + capacity * self.RECORD.size)
+        old = TrackStore(self.path, capacity)
+        old._map = data
+        old._head = head % capacity
+        old._count = min(count, capacity, max(len(data) - self.HEADER_SIZE, 0) // self.RECORD.size)
+        return [old._read(index) for index in range(old._count)]
@@ -0,0 +1,134 @@
+"""Cheap in-memory performance counters for the coordinators."""
+import bisect
+import time
+from typing import Optional
+
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)  # Milliseconds, network round trips
+CPU_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25)  # Milliseconds, local processing
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds.
+
+    An observation is one ``bisect`` plus a few integer updates. Everything
+    runs on the event loop, so the counters need no locking.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "maximum", "last")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = None
+
+    def observe(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.last = milliseconds
+        if milliseconds > self.maximum:
+            self.maximum = milliseconds
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def as_dict(self) -> dict:
+        buckets = {f"<={bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "last": _round(self.last),
+            "mean": _round(self.mean),
+            "p50": _round(self.percentile(0.5)),
+            "p90": _round(self.percentile(0.9)),
+            "p99": _round(self.percentile(0.99)),
+            "max": _round(self.maximum),
+            "buckets": buckets,
+        }
+
+class AccountMetrics:
+    """vehicleHomePage fetch statistics for one account."""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.decode = Histogram(CPU_BUCKETS)
+        self.fetches = 0
+        self.unchanged_bodies = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.last_success = None  # Epoch seconds
+
+    def record_request(self, round_trip: float, decode: Optional[float]) -> None:
+        """Record one HTTP round trip and JSON decode in seconds; no decode means a repeated body."""
+        self.latency.observe(round_trip * 1000)
+        if decode is None:
+            self.unchanged_bodies += 1
+        else:
+            self.decode.observe(decode * 1000)
+
+    def record_success(self) -> None:
+        self.fetches += 1
+        self.consecutive_failures = 0
+        self.last_success = time.time()
+
+    def record_failure(self, error) -> None:
+        self.fetches += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+
+    def as_dict(self) -> dict:
+        return {
+            "fetches": self.fetches,
+            "unchanged_bodies": self.unchanged_bodies,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+            "latency_ms": self.latency.as_dict(),
+            "json_decode_ms": self.decode.as_dict(),
+        }
+
+class VehicleMetrics:
+    """Processing and freshness statistics for one vehicle coordinator."""
+
+    def __init__(self):
+        self.process = Histogram(CPU_BUCKETS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.unchanged_payloads = 0
+        self.location_age = None  # Seconds between locationTime and querytime
+
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else None
+
+    def as_dict(self) -> dict:
+        return {
+            "process_data_ms": self.process.as_dict(),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": _round(self.cache_hit_rate),
+            "unchanged_payloads": self.unchanged_payloads,
+            "location_age_seconds": _round(self.location_age),
+        }
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
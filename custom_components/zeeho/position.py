@@ -0,0 +1,67 @@
+"""Stationary-position filter for parked vehicles."""
+from collections import deque
+from statistics import median
+from typing import Optional, Tuple
+
+from .utils import haversine
+
+STATIONARY_RADIUS = 30  # Metres; parked fixes this close to the published position are jitter
+WINDOW = 5  # Recent parked fixes whose median decides whether the vehicle was moved
+
+class PositionFilter:
+    """Hold a parked vehicle's position still while its GPS fix wanders.
+
+    While the vehicle rides, or its odometer moved since the previous fix,
+    every fix is published as is. While it is parked, fixes within
+    ``radius`` metres of the published position are jitter and the
+    published position stays. A fix farther out only moves it once the
+    median of the last ``window`` parked fixes is out there too, so a
+    single wild fix is ignored but a vehicle that was towed or pushed
+    still follows within a few polls. The latest raw fix is kept in
+    ``raw``.
+    """
+
+    def __init__(self, radius: float = STATIONARY_RADIUS, window: int = WINDOW):
+        self.radius = radius
+        self.position: Optional[Tuple[float, float]] = None  # Published (lng, lat)
+        self.raw: Optional[Tuple[float, float]] = None
+        self.suppressed = 0  # Parked fixes held back as jitter
+        self._fixes = deque(maxlen=window)
+        self._odometer = None
+
+    def seed(self, lng: Optional[float], lat: Optional[float]) -> None:
+        """Start from a known published position, e.g. a restored snapshot."""
+        if lng is not None and lat is not None:
+            self.position = (lng, lat)
+            self._fixes.clear()
+
+    def update(self, lng: Optional[float], lat: Optional[float], riding: bool,
+               odometer: Optional[float]) -> Tuple[Optional[float], Optional[float]]:
+        """Feed one fix; return the (lng, lat) to publish."""
+        moved = odometer is not None and self._odometer is not None and odometer != self._odometer
+        if odometer is not None:
+            self._odometer = odometer
+        if lng is None or lat is None:
+            return lng, lat
+        self.raw = (lng, lat)
+        if riding or moved or self.position is None:
+            self._fixes.clear()
+            self.position = self.raw
+            return self.position
+
+        self._fixes.append(self.raw)
+        if haversine(*self.position, lng, lat) > self.radius:
+            centre = (median(fix[0] for fix in self._fixes), median(fix[1] for fix in self._fixes))
+            if haversine(*self.position, *centre) > self.radius:
+                self._fixes.clear()
+                self.position = centre
+                return self.position
+        self.suppressed += 1
+        return self.position
+
+    def as_dict(self) -> dict:
+        return {
+            "radius": self.radius,
+            "suppressed": self.suppressed,
+            "offset": round(haversine(*self.position, *self.raw), 1) if self.position and self.raw else None,
+        }
@@ -0,0 +1,135 @@
+"""Integration-wide scheduling of ZEEHO API polls."""
+import asyncio
+import heapq
+import itertools
+import math
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+REQUEST_RATE = 1.0  # Tokens per second
+REQUEST_BURST = 5  # Bucket size
+MAX_IN_FLIGHT = 4  # Concurrent requests
+
+PRIORITY_PARKED = 0
+PRIORITY_ACTIVE = 1  # Riding or charging
+
+class RequestScheduler:
+    """Spread account polls over their interval and gate them with a token bucket.
+
+    Each registered poller gets an evenly spaced phase within its poll
+    interval, so entries loaded together do not poll together. Pollers
+    provide ``async_realign()``, called whenever the phases change. Requests
+    take a slot: a token from a bucket refilled at ``rate`` per second (up
+    to ``burst``) and one of ``max_in_flight`` concurrency places. Waiting
+    requests are served by priority, then in arrival order.
+    """
+
+    def __init__(self, hass, rate: float = REQUEST_RATE, burst: float = REQUEST_BURST,
+                 max_in_flight: int = MAX_IN_FLIGHT):
+        self.hass = hass
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._tokens = burst
+        self._refilled = hass.loop.time()
+        self._waiters = []  # Heap of (-priority, sequence, future)
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self._pollers = []
+
+    def add(self, poller) -> None:
+        if poller not in self._pollers:
+            self._pollers.append(poller)
+            self._realign()
+
+    def remove(self, poller) -> None:
+        if poller in self._pollers:
+            self._pollers.remove(poller)
+            self._realign()
+
+    def _realign(self) -> None:
+        for poller in self._pollers:
+            poller.async_realign()
+
+    def next_delay(self, poller, interval: timedelta) -> timedelta:
+        """Return the delay to the poller's next phase slot.
+
+        The slot lies between half and one and a half intervals from now, so
+        a poller drifts onto its phase within one poll and then keeps its
+        nominal interval.
+        """
+        count = len(self._pollers)
+        if count < 2 or poller not in self._pollers:
+            return interval
+        seconds = interval.total_seconds()
+        phase = seconds * self._pollers.index(poller) / count
+        now = self.hass.loop.time()
+        slot = phase + math.ceil((now + seconds / 2 - phase) / seconds) * seconds
+        return timedelta(seconds=slot - now)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_PARKED):
+        """Hold a request slot for the duration of the block."""
+        await self._async_acquire(priority)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def as_dict(self) -> dict:
+        self._refill()
+        return {
+            "pollers": len(self._pollers),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for *_, future in self._waiters if not future.done()),
+            "tokens": round(self._tokens, 2),
+        }
+
+    async def _async_acquire(self, priority: int) -> None:
+        if not self._waiters and self._try_take():
+            return
+        future = self.hass.loop.create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _try_take(self) -> bool:
+        self._refill()
+        if self.in_flight >= self.max_in_flight or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.in_flight += 1
+        return True
+
+    def _refill(self) -> None:
+        now = self.hass.loop.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in priority order while tokens and places last."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        if self._waiters and self.in_flight < self.max_in_flight:
+            # Out of tokens: come back when the next one is due
+            delay = (1 - self._tokens) / self.rate
+            self._wakeup = self.hass.loop.call_later(delay, self._dispatch)
@@ -0,0 +1,225 @@
+"""Declarative field schema for vehicleHomePage payloads."""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+def to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+def to_int(value):
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+def _charge_state(data):
+    if data.get("chargeState") == "1":
+        return "Charging"
+    return "Fully Charged" if data.get("bmssoc") == "100" else "On Battery"
+
+class Field(NamedTuple):
+    """One snapshot field.
+
+    ``path`` is the key path inside the vehicle payload; an empty path marks a
+    field filled in by the coordinator (``derived``). ``default`` is the raw
+    value used when the key is missing and goes through conversion like any
+    other value. ``enum`` maps raw values, with ``fallback`` (a value or a
+    callable taking the raw value) for anything not in the map. ``compute``
+    receives the whole payload for fields that depend on several keys, which
+    are listed as paths in ``needs`` so the payload projection keeps them.
+    """
+
+    name: str
+    path: Tuple[str, ...] = ()
+    converter: Optional[Callable[[Any], Any]] = None
+    enum: Optional[Dict[Any, Any]] = None
+    fallback: Any = None
+    default: Any = None
+    compute: Optional[Callable[[dict], Any]] = None
+    needs: Tuple[Tuple[str, ...], ...] = ()
+
+FIELDS = (
+    Field("location_key"),
+    Field("device_model", ("vehicleModel",), default="ZeehoEV"),
+    Field("vehicleName", ("vehicleName",), default="ZeehoEV"),
+    Field("querytime"),
+    Field("latitude", ("location", "latitude"), to_float),
+    Field("longitude", ("location", "longitude"), to_float),
+    Field("raw_latitude"),  # Fix as reported; latitude/longitude hold still while parked
+    Field("raw_longitude"),
+    Field("thislat"),  # Position shown by the tracker: WGS84, or GCJ02 without conversion
+    Field("thislon"),
+    Field("map_gcj_lat"),
+    Field("map_gcj_lng"),
+    Field("map_bd_lat"),
+    Field("map_bd_lng"),
+    Field("headLockState", ("headLockState",), enum={"0": "Unlocked", "1": "Locked"},
+          fallback=lambda raw: f"Unknown {raw}", default="Unknown"),
+    Field("bmssoc", ("bmssoc",), to_int),
+    Field("chargeState", compute=_charge_state, needs=(("chargeState",), ("bmssoc",))),
+    Field("locationTime", ("location", "locationTime")),
+    Field("vinNo", ("vinNo",)),
+    Field("deviceName", ("deviceName",)),
+    Field("hmiRidableMile", ("hmiRidableMile",), to_int),
+    Field("rideState", ("rideState",), enum={"在线": "Online"}, fallback="Offline"),
+    Field("greenContribution", ("greenContribution",), to_float),
+    Field("otaVersion", ("otaVersion",)),
+    Field("vehicleType", ("vehicleType",)),
+    Field("vehicleTypeName", ("vehicleTypeName",)),
+    Field("totalRideMile", ("totalRideMile",), to_float),
+    Field("maxMileage", ("maxMileage",), to_int),
+    Field("onlineStatus", ("onlineStatus",)),
+    Field("address"),
+)
+
+FIELD_NAMES = tuple(field.name for field in FIELDS)
+_INDEX = {name: position for position, name in enumerate(FIELD_NAMES)}
+
+class VehicleSnapshot(tuple):
+    """Immutable processed vehicle state.
+
+    A tuple subclass with empty ``__slots__`` (like ``namedtuple``), so a
+    snapshot carries no per-instance ``__dict__`` and is built in one call.
+    Fields are attributes, and the read-only mapping calls entities use
+    (``get``, ``[]``, ``in``, ``keys``/``items``) take field names.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return tuple.__getitem__(self, _INDEX[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in _INDEX
+
+    def __repr__(self):
+        return f"VehicleSnapshot({self.as_dict()!r})"
+
+    def get(self, key, default=None):
+        position = _INDEX.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def keys(self):
+        return FIELD_NAMES
+
+    def items(self):
+        return zip(FIELD_NAMES, tuple.__iter__(self))
+
+    def as_dict(self) -> dict:
+        return dict(zip(FIELD_NAMES, tuple.__iter__(self)))
+
+    def replace(self, **changes) -> "VehicleSnapshot":
+        """Return a copy with some fields changed."""
+        values = list(tuple.__iter__(self))
+        for key, value in changes.items():
+            values[_INDEX[key]] = value
+        return tuple.__new__(VehicleSnapshot, values)
+
+    def diff(self, other: "VehicleSnapshot") -> frozenset:
+        """Return the names of fields whose values differ from ``other``."""
+        return frozenset(
+            name for name, mine, theirs in zip(FIELD_NAMES, tuple.__iter__(self), tuple.__iter__(other))
+            if mine != theirs
+        )
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "VehicleSnapshot":
+        """Build a snapshot from ``as_dict`` output, ignoring unknown keys."""
+        return tuple.__new__(cls, [values.get(name) for name in FIELD_NAMES])
+
+def _field_property(position: int, name: str) -> property:
+    return property(lambda self: tuple.__getitem__(self, position), doc=f"Field {name!r}")
+
+for _position, _name in enumerate(FIELD_NAMES):
+    setattr(VehicleSnapshot, _name, _field_property(_position, _name))
+
+def compile_schema(fields=FIELDS) -> Callable[..., VehicleSnapshot]:
+    """Compile ``fields`` into an extractor ``(payload, **derived) -> VehicleSnapshot``.
+
+    The schema is turned into the source of one straight-line function, the
+    same technique ``namedtuple`` and ``dataclasses`` use. Each nested object
+    (e.g. ``location``) is looked up once and each field becomes a single
+    ``get`` plus its converter, with no per-field loop or dispatch.
+    """
+    if tuple(field.name for field in fields) != FIELD_NAMES:
+        raise ValueError("Schema fields must match VehicleSnapshot fields")
+    namespace = {"_new": tuple.__new__, "_cls": VehicleSnapshot, "_EMPTY": {}}
+    parents = {}
+    values = []
+    derived = []
+    for position, field in enumerate(fields):
+        if field.compute is not None:
+            namespace[f"_f{position}"] = field.compute
+            values.append(f"_f{position}(payload)")
+            continue
+        if not field.path:
+            derived.append(field.name)
+            values.append(field.name)
+            continue
+        parent = field.path[:-1]
+        if parent not in parents:
+            parents[parent] = f"_p{len(parents)}"
+        lookup = f"{parents[parent]}({field.path[-1]!r}"
+        if field.default is not None:
+            namespace[f"_d{position}"] = field.default
+            lookup += f", _d{position}"
+        lookup += ")"
+        if field.enum is not None:
+            namespace[f"_m{position}"] = field.enum
+            namespace[f"_e{position}"] = field.fallback
+            if callable(field.fallback):
+                lookup = f"(_m{position}[_v] if (_v := {lookup}) in _m{position} else _e{position}(_v))"
+            else:
+                lookup = f"_m{position}.get({lookup}, _e{position})"
+        elif field.converter is not None:
+            namespace[f"_c{position}"] = field.converter
+            lookup = f"_c{position}({lookup})"
+        values.append(lookup)
+
+    prologue = []
+    for parent, name in parents.items():
+        expression = "payload"
+        for key in parent:
+            expression = f"({expression}.get({key!r}) or _EMPTY)"
+        prologue.append(f"    {name} = {expression}.get")
+    arguments = "".join(f", {name}=None" for name in derived)
+    body = ",\n        ".join(values)
+    source = "\n".join(
+        [f"def extract(payload{arguments}):", *prologue, f"    return _new(_cls, (\n        {body},\n    ))"]
+    )
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace["extract"]
+
+extract_snapshot = compile_schema()
+
+def compile_projection(fields=FIELDS) -> dict:
+    """Return the payload keys the schema reads, as a tree ``{key: subtree or None}``."""
+    projection = {}
+    for field in fields:
+        for path in (field.path, *field.needs) if field.path else field.needs:
+            node = projection
+            for key in path[:-1]:
+                if node.get(key) is None:
+                    node[key] = {}
+                node = node[key]
+            node.setdefault(path[-1], None)
+    return projection
+
+def project(payload: dict, projection: dict) -> dict:
+    """Copy only the keys in ``projection`` out of a decoded payload."""
+    result = {}
+    for key, subtree in projection.items():
+        if key in payload:
+            value = payload[key]
+            result[key] = project(value, subtree) if subtree and isinstance(value, dict) else value
+    return result
+
+PAYLOAD_PROJECTION = compile_projection()
@@ -4,16 +4,20 @@ from datetime import timedelta
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
+    SensorEntity,
     SensorEntityDescription,
     SensorStateClass,
 )
 
-from homeassistant.const import UnitOfLength
+from homeassistant.const import PERCENTAGE, UnitOfLength, UnitOfSpeed, UnitOfTime
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    ATTR_QUERYTIME,
+    ATTR_TIER_FULL,
+    ATTR_TIER_NONE,
     CONF_NAME,
     COORDINATOR,
     DOMAIN,
@@ -22,6 +26,7 @@ from .const import (
     KEY_CHARGESTATE,
     KEY_HEADLOCKSTATE,
     KEY_LOCATIONTIME,
+    KEY_QUERYTIME,
     KEY_TOTALRIDEMILE,
 )
 
@@ -61,8 +66,117 @@ SENSOR_TYPES: dict[str, SensorEntityDescription] = {
     ),
 }
 
+# Performance metrics, disabled by default: (description, value from the coordinator)
+METRIC_TYPES = {
+    "api_latency": (
+        SensorEntityDescription(
+            key="api_latency",
+            name="API Latency",
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:timer-sand",
+        ),
+        lambda coordinator: coordinator.account.metrics.latency.last,
+    ),
+    "process_time": (
+        SensorEntityDescription(
+            key="process_time",
+            name="Processing Time",
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:cpu-64-bit",
+        ),
+        lambda coordinator: coordinator.metrics.process.last,
+    ),
+    "location_age": (
+        SensorEntityDescription(
+            key="location_age",
+            name="Location Age",
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:map-clock",
+        ),
+        lambda coordinator: coordinator.metrics.location_age,
+    ),
+    "consecutive_failures": (
+        SensorEntityDescription(
+            key="consecutive_failures",
+            name="Consecutive Failures",
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:alert-circle-outline",
+        ),
+        lambda coordinator: coordinator.account.metrics.consecutive_failures,
+    ),
+    "cache_hit_rate": (
+        SensorEntityDescription(
+            key="cache_hit_rate",
+            name="Cache Hit Rate",
+            native_unit_of_measurement=PERCENTAGE,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:cached",
+        ),
+        lambda coordinator: (
+            None if coordinator.metrics.cache_hit_rate is None else coordinator.metrics.cache_hit_rate * 100
+        ),
+    ),
+}
+
+# Last completed trip: (description, value from the Trip)
+TRIP_TYPES = {
+    "trip_distance": (
+        SensorEntityDescription(
+            key="trip_distance",
+            name="Last Trip Distance",
+            native_unit_of_measurement=UnitOfLength.KILOMETERS,
+            device_class=SensorDeviceClass.DISTANCE,
+            icon="mdi:map-marker-path",
+        ),
+        lambda trip: trip.distance,
+    ),
+    "trip_duration": (
+        SensorEntityDescription(
+            key="trip_duration",
+            name="Last Trip Duration",
+            native_unit_of_measurement=UnitOfTime.MINUTES,
+            device_class=SensorDeviceClass.DURATION,
+            icon="mdi:timer-outline",
+        ),
+        lambda trip: trip.duration / 60,
+    ),
+    "trip_average_speed": (
+        SensorEntityDescription(
+            key="trip_average_speed",
+            name="Last Trip Average Speed",
+            native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+            device_class=SensorDeviceClass.SPEED,
+            icon="mdi:speedometer",
+        ),
+        lambda trip: trip.average_speed,
+    ),
+    "trip_consumption": (
+        SensorEntityDescription(
+            key="trip_consumption",
+            name="Last Trip Consumption",
+            native_unit_of_measurement=f"{PERCENTAGE}/{UnitOfLength.KILOMETERS}",
+            icon="mdi:battery-arrow-down-outline",
+        ),
+        lambda trip: trip.soc_per_km,
+    ),
+}
+
 SCAN_INTERVAL = timedelta(seconds=60)
 
+# Coordinator keys read by ZeehoDiagnosticSensor
+DIAGNOSTIC_KEYS = frozenset({
+    "vehicleName", "otaVersion", "headLockState", "bluetoothAddress", "bmssoc",
+    "chargeState", "fullChargeTime", "maxMileage", "totalRideMile", "rideState",
+    "locationTime", "address", "latitude", "longitude", "map_gcj_lat", "map_gcj_lng",
+    "map_bd_lat", "map_bd_lng", "greenContribution",
+})
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Add Zeeho entities from a config_entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
@@ -74,7 +188,16 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     sensors.extend([
         ZeehoDiagnosticSensor(device_name, coordinator),
+        ZeehoQueryTimeSensor(coordinator),
     ])
+    sensors.extend(
+        ZeehoMetricSensor(description, value_fn, coordinator)
+        for description, value_fn in METRIC_TYPES.values()
+    )
+    sensors.extend(
+        ZeehoTripSensor(description, value_fn, coordinator)
+        for description, value_fn in TRIP_TYPES.values()
+    )
 
     async_add_entities(sensors, False)
 
@@ -83,16 +206,17 @@ class ZeehoSensorEntity(CoordinatorEntity):
     
     _attr_has_entity_name = True
       
-    def __init__(self, device_name, description, coordinator):
+    def __init__(self, device_name, description, coordinator, context=None):
         """Initialize."""
-        super().__init__(coordinator)
+        # Only wake up when the coordinator reports a change in our source keys
+        super().__init__(coordinator, context or frozenset({description.key}))
         self.entity_description = description
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}-{description.key}"
         self._attr_device_info = get_device_info(coordinator)
         self._device_name = device_name
         self._attr_translation_key = f"{self.entity_description.name}"
         self._state = None
-        self._attrs = {}
+        self._attrs = None
         self._update_state()
 
     def _update_state(self):
@@ -112,8 +236,6 @@ class ZeehoSensorEntity(CoordinatorEntity):
         else:
             _LOGGER.warning("Unknown sensor key: %s", self.entity_description.key)
 
-        self._attrs = {ATTR_QUERYTIME: self.coordinator.data.get(ATTR_QUERYTIME)}
-        
         _LOGGER.debug("Updated state for %s: %s", self.entity_description.key, self._state)
 
     @property
@@ -131,6 +253,12 @@ class ZeehoSensorEntity(CoordinatorEntity):
         """Return extra state attributes."""
         return self._attrs
 
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator."""
+        self._update_state()
+        self.async_write_ha_state()
+
     async def async_update(self):
         """Update Zeeho entity."""
         _LOGGER.debug("Refreshing sensor data")
@@ -142,55 +270,155 @@ class ZeehoDiagnosticSensor(ZeehoSensorEntity):
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_options = ["🟢 Online", "🔴 Offline"]
     _attr_entity_category = EntityCategory.DIAGNOSTIC
-    
+    # Positions are recorded by the tracker already; leaving them out lets the
+    # recorder share one attributes row between polls that only moved the vehicle
+    _unrecorded_attributes = frozenset({
+        "Last Parking Time", "Latitude", "Longitude", "Gaode Map Latitude", "Gaode Map Longitude",
+        "Baidu Map Latitude", "Baidu Map Longitude",
+    })
+    _attrs_source = None  # (snapshot, stale, tier) the attributes were built from
+
     def __init__(self, device_name, coordinator):
         description = SensorEntityDescription(
             key="diagnostic",
             name="Diagnostic",
             device_class=SensorDeviceClass.ENUM,
         )
-        super().__init__(device_name, description, coordinator)
+        super().__init__(device_name, description, coordinator, DIAGNOSTIC_KEYS)
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}-diagnostic"
 
     def _update_state(self):
-        self._state = "🟢 Online" if self.coordinator.data.get("rideState") == "Online" else "🔴 Offline"
+        data = self.coordinator.data
+        self._state = "🟢 Online" if data.get("rideState") == "Online" else "🔴 Offline"
+        # Snapshots are immutable, so the attributes only need rebuilding for a new one
+        source = self._attrs_source
+        if (source is None or source[0] is not data or source[1] != self.coordinator.stale
+                or source[2] != self.coordinator.attr_tier):
+            self._attrs_source = (data, self.coordinator.stale, self.coordinator.attr_tier)
+            self._attrs = _diagnostic_attributes(data, self.coordinator.stale, self.coordinator.attr_tier)
         _LOGGER.debug("Updated diagnostic state: %s", self._state)
 
+def _diagnostic_attributes(data, stale, tier):
+    """Build the diagnostic sensor's attributes for an attribute tier."""
+    if not data or tier == ATTR_TIER_NONE:
+        return None
+    attributes = {
+        "Vehicle Name": data.get("vehicleName"),
+        "Car Lock Status": data.get("headLockState"),
+        "Vehicle Battery Level": f"{data.get('bmssoc', 0)}%",
+        "Charging Status": data.get("chargeState"),
+        "Ride State": data.get("rideState"),
+        "Stale": stale,
+        "Address": data.get("address"),
+    }
+    if tier != ATTR_TIER_FULL:
+        return attributes
+    attributes.update({
+        "OTA Version": data.get("otaVersion"),
+        "Bluetooth Address": data.get("bluetoothAddress"),
+        "Full Charge Time": data.get("fullChargeTime"),
+        "Max Mileage": f"{data.get('maxMileage', 0)} {UnitOfLength.KILOMETERS}",
+        "Total Ride Mileage": f"{data.get('totalRideMile', 0)} {UnitOfLength.KILOMETERS}",
+        "Last Parking Time": data.get("locationTime"),
+        "Data Source": "GPS Positioning",
+        "Latitude": data.get("latitude"),
+        "Longitude": data.get("longitude"),
+        "GPS Accuracy": "0 m",
+        "Gaode Map Latitude": data.get("map_gcj_lat"),
+        "Gaode Map Longitude": data.get("map_gcj_lng"),
+        "Baidu Map Latitude": data.get("map_bd_lat"),
+        "Baidu Map Longitude": data.get("map_bd_lng"),
+        "Max Range": f"{data.get('maxMileage', 0)} {UnitOfLength.KILOMETERS}",
+        "Green Contribution": f"{data.get('greenContribution', 0)} kg CO₂",
+    })
+    return attributes
+
+class ZeehoQueryTimeSensor(CoordinatorEntity, SensorEntity):
+    """Freshness of the vehicle data, with the time of the last poll.
+
+    The poll time moves on every poll whether or not anything changed. It is
+    kept out of other entities' attributes and out of the recorder: the state
+    is whether the data is live or a stale snapshot, and ``querytime`` is an
+    unrecorded attribute.
+    """
+
+    _attr_has_entity_name = True
+    _attr_name = "Query Time"
+    _attr_icon = "mdi:clock-check-outline"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = ["live", "stale"]
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({KEY_QUERYTIME})
+
+    def __init__(self, coordinator):
+        # No context: querytime is never among the changed keys
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}-{KEY_QUERYTIME}"
+        self._attr_device_info = get_device_info(coordinator)
+
     @property
     def native_value(self):
-        self._update_state()
-        return self._state
+        return "stale" if self.coordinator.stale else "live"
 
     @property
     def extra_state_attributes(self):
-        data = self.coordinator.data
-        if not data:
-            return {}
+        return {KEY_QUERYTIME: self.coordinator.data.get(KEY_QUERYTIME)}
+
+class ZeehoMetricSensor(CoordinatorEntity, SensorEntity):
+    """Coordinator performance metric, for tuning poll intervals."""
 
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, description, value_fn, coordinator):
+        # No context: metrics move on every poll, even when the snapshot does not
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._value_fn = value_fn
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}-{description.key}"
+        self._attr_device_info = get_device_info(coordinator)
+
+    @property
+    def available(self):
+        # Stay available while polls fail, that is when failure counts matter
+        return True
+
+    @property
+    def native_value(self):
+        return self._value_fn(self.coordinator)
+
+class ZeehoTripSensor(CoordinatorEntity, SensorEntity):
+    """Statistic of the last completed trip, from the coordinator's trip detector."""
+
+    _attr_has_entity_name = True
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, description, value_fn, coordinator):
+        # "trip" is flagged in the changed keys when a trip ends
+        super().__init__(coordinator, frozenset({"trip"}))
+        self.entity_description = description
+        self._value_fn = value_fn
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}-{description.key}"
+        self._attr_device_info = get_device_info(coordinator)
+
+    @property
+    def native_value(self):
+        trip = self.coordinator.trips.last_trip
+        return None if trip is None else self._value_fn(trip)
+
+    @property
+    def extra_state_attributes(self):
+        trip = self.coordinator.trips.last_trip
+        if trip is None or self.coordinator.attr_tier == ATTR_TIER_NONE:
+            return None
         return {
-            "Vehicle Name": data.get("vehicleName"),
-            "OTA Version": data.get("otaVersion"),
-            "Car Lock Status": data.get("headLockState"),
-            "Bluetooth Address": data.get("bluetoothAddress"),
-            "Vehicle Battery Level": f"{data.get('bmssoc', 0)}%",
-            "Charging Status": data.get("chargeState"),
-            "Full Charge Time": data.get("fullChargeTime"),
-            "Max Mileage": f"{data.get('maxMileage', 0)} {UnitOfLength.KILOMETERS}",
-            "Total Ride Mileage": f"{data.get('totalRideMile', 0)} {UnitOfLength.KILOMETERS}",
-            "Ride State": data.get("rideState"),
-            "Last Parking Time": data.get("locationTime"),
-            "Querytime": data.get("querytime"),
-            "Address": data.get("address"),
-            "Data Source": "GPS Positioning",
-            "Latitude": data.get("latitude"),
-            "Longitude": data.get("longitude"),
-            "GPS Accuracy": "0 m",
-            "Gaode Map Latitude": data.get("map_gcj_lat"),
-            "Gaode Map Longitude": data.get("map_gcj_lng"),
-            "Baidu Map Latitude": data.get("map_bd_lat"),
-            "Baidu Map Longitude": data.get("map_bd_lng"),
-            "Max Range": f"{data.get('maxMileage', 0)} {UnitOfLength.KILOMETERS}",
-            "Green Contribution": f"{data.get('greenContribution', 0)} kg CO₂",
+            "start": dt_util.utc_from_timestamp(trip.start).isoformat(),
+            "end": dt_util.utc_from_timestamp(trip.end).isoformat(),
+            "soc_used": trip.soc_used,
+            "trips": self.coordinator.trips.trip_count,
         }
 
 # class ZeehoVehiclePhotoSensor(ZeehoSensorEntity):
@@ -0,0 +1,90 @@
+"""Online track simplification and time-bucketed downsampling."""
+from typing import List, Optional, Sequence
+
+from .const import DEFAULT_TRACK_TOLERANCE
+from .history import TrackPoint, TrackStore
+from .utils import segment_distance
+
+MAX_WINDOW = 64  # Points merged into one segment at most, bounding the work per append
+HOUR = 3600
+
+class TrackSimplifier:
+    """Simplify a ``TrackStore`` as points arrive (opening-window Douglas-Peucker).
+
+    The newest record is provisional. When a new point arrives and every
+    point merged since the record before it (the anchor), the newest one
+    included, lies within ``tolerance`` metres of the straight segment from
+    the anchor to the new point, the newest record is overwritten instead
+    of a record being added. A straight run of any number of polls is thus
+    stored as its two ends, and a winding road keeps one record per bend.
+
+    A point is only merged away if it carried nothing but position and
+    odometer, i.e. its SOC and ride state match the anchor's, and never
+    across an hour boundary, so the hourly statistics read from the track
+    are unchanged. The merged points live in memory only; after a restart
+    the next point is simply appended.
+    """
+
+    def __init__(self, tolerance: float = DEFAULT_TRACK_TOLERANCE, max_window: int = MAX_WINDOW):
+        self.tolerance = tolerance
+        self.max_window = max_window
+        self.merged = 0  # Records saved since startup
+        self._anchor: Optional[TrackPoint] = None
+        self._window = []  # (lng, lat) of the points merged into the newest record's segment
+        self._tail_time = None  # Timestamp of the newest record when the window was built
+
+    def append(self, store: TrackStore, point: TrackPoint) -> bool:
+        """Add a point to the store; returns False if it repeats the newest record."""
+        if store.repeats(point):
+            return False
+        latest = store.latest()
+        if self._mergeable(latest, point) and store.replace_latest(point):
+            self._window.append((latest.longitude, latest.latitude))
+            self._tail_time = point.timestamp
+            self.merged += 1
+            return True
+        if not store.append(point):
+            return False
+        self._anchor = latest
+        self._window = []
+        self._tail_time = point.timestamp
+        return True
+
+    def _mergeable(self, latest: Optional[TrackPoint], point: TrackPoint) -> bool:
+        anchor = self._anchor
+        if (
+            self.tolerance <= 0
+            or latest is None
+            or anchor is None
+            or latest.timestamp != self._tail_time
+            or len(self._window) >= self.max_window
+            or latest.soc != anchor.soc
+            or latest.ride_state != anchor.ride_state
+            or anchor.timestamp // HOUR != point.timestamp // HOUR
+        ):
+            return False
+        return all(
+            segment_distance(lng, lat, anchor.longitude, anchor.latitude, point.longitude, point.latitude)
+            <= self.tolerance
+            for lng, lat in (*self._window, (latest.longitude, latest.latitude))
+        )
+
+def downsample(points: Sequence[TrackPoint], bucket: float) -> List[TrackPoint]:
+    """Keep the last point of every ``bucket`` seconds, plus the first point.
+
+    Points where the ride state changes are kept as well, so rides still
+    start and end where they did. ``points`` must be oldest first.
+    """
+    if bucket <= 0 or len(points) < 3:
+        return list(points)
+    result = [points[0]]
+    for previous, point in zip(points, points[1:]):
+        if point.ride_state != previous.ride_state:
+            if result[-1] is not previous:
+                result.append(previous)
+            result.append(point)
+        elif point.timestamp // bucket != previous.timestamp // bucket and result[-1] is not previous:
+            result.append(previous)
+    if result[-1] is not points[-1]:
+        result.append(points[-1])
+    return result
@@ -0,0 +1,150 @@
+"""Hourly long-term statistics built from the track history."""
+import logging
+from typing import List, NamedTuple, Optional, Sequence
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.const import PERCENTAGE, UnitOfLength
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .history import TrackPoint
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+IMPORT_MINUTE = 5  # Minute past the hour at which finished hours are imported
+MAX_BACKFILL = 30 * 24 * HOUR  # Seconds of history imported after a long outage
+
+class HourStats(NamedTuple):
+    start: float  # Epoch seconds, top of the hour
+    soc_min: Optional[int]
+    soc_max: Optional[int]
+    soc_mean: Optional[float]  # Time-weighted
+    odometer: Optional[float]  # Reading at the end of the hour
+
+def aggregate_hours(points: Sequence[TrackPoint], carry: Optional[TrackPoint],
+                    start: float, end: float) -> List[HourStats]:
+    """Fold track points into hourly statistics for the hours in ``[start, end)``.
+
+    ``points`` are the records in that window, oldest first, and ``carry``
+    is the record just before it. The track only stores changes, so a value
+    holds until the next record; the mean is weighted by how long each
+    value held. Hours before the first known value are skipped.
+    """
+    hours = []
+    current = carry
+    index = 0
+    hour = start
+    while hour < end:
+        hour_end = hour + HOUR
+        soc_min = soc_max = None
+        weighted = 0.0
+        covered = 0.0
+        since = hour
+        while True:
+            until = points[index].timestamp if index < len(points) and points[index].timestamp < hour_end else hour_end
+            if current is not None and current.soc is not None:
+                soc = current.soc
+                soc_min = soc if soc_min is None else min(soc_min, soc)
+                soc_max = soc if soc_max is None else max(soc_max, soc)
+                weighted += soc * (until - since)
+                covered += until - since
+            if until == hour_end:
+                break
+            current = points[index]
+            since = until
+            index += 1
+        if current is not None:
+            hours.append(HourStats(
+                hour, soc_min, soc_max, weighted / covered if covered else soc_min, current.odometer,
+            ))
+        hour = hour_end
+    return hours
+
+class StatisticsImporter:
+    """Import a vehicle's hourly SOC and odometer statistics in bulk.
+
+    Finished hours are aggregated from the vehicle coordinator's
+    ``TrackStore`` and added as external statistics (``zeeho:<entry>_soc``
+    with min/max/mean, ``zeeho:<entry>_odometer`` with the reading and the
+    distance sum), one recorder job per run. Each run resumes after the last imported hour, so
+    hours missed while Home Assistant or the recorder was down are
+    backfilled from the track history on the next run.
+    """
+
+    def __init__(self, hass, entry_id: str, name: str, coordinator):
+        self.hass = hass
+        self.coordinator = coordinator
+        object_id = entry_id.lower()
+        self.soc_metadata = StatisticMetaData(
+            has_mean=True, has_sum=False, name=f"{name} Battery", source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{object_id}_soc", unit_of_measurement=PERCENTAGE,
+        )
+        self.odometer_metadata = StatisticMetaData(
+            has_mean=False, has_sum=True, name=f"{name} Odometer", source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{object_id}_odometer", unit_of_measurement=UnitOfLength.KILOMETERS,
+        )
+        self._imported_until = None  # End of the last imported hour, epoch seconds
+        self._odometer = None  # Last imported (state, sum)
+        self._running = False
+
+    async def async_import(self, now=None) -> None:
+        """Import every finished hour since the last run."""
+        if self._running or "recorder" not in self.hass.config.components:
+            return
+        self._running = True
+        try:
+            if self._imported_until is None:
+                await self._async_resume()
+            track_store = self.coordinator.track_store
+            if track_store is None:
+                return  # Being resized; the next run catches up
+            end = dt_util.utcnow().timestamp() // HOUR * HOUR
+            start = self._imported_until
+            if start is None:
+                oldest = track_store.oldest()
+                if oldest is None:
+                    return
+                start = oldest.timestamp // HOUR * HOUR
+            start = max(start, end - MAX_BACKFILL)
+            if start >= end:
+                return
+            hours = aggregate_hours(
+                track_store.query(start, end - 1e-6), track_store.latest_before(start), start, end
+            )
+            self._async_add(hours)
+            self._imported_until = end
+        finally:
+            self._running = False
+
+    async def _async_resume(self) -> None:
+        """Pick up where the recorder's statistics end."""
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, self.odometer_metadata["statistic_id"], False, {"state", "sum"}
+        )
+        rows = last.get(self.odometer_metadata["statistic_id"])
+        if rows:
+            self._imported_until = rows[0]["start"] + HOUR
+            self._odometer = (rows[0].get("state"), rows[0].get("sum") or 0.0)
+
+    def _async_add(self, hours: List[HourStats]) -> None:
+        soc_rows = []
+        odometer_rows = []
+        for stats in hours:
+            start = dt_util.utc_from_timestamp(stats.start)
+            if stats.soc_mean is not None:
+                soc_rows.append(StatisticData(start=start, mean=stats.soc_mean, min=stats.soc_min, max=stats.soc_max))
+            if stats.odometer is not None:
+                state, total = self._odometer or (stats.odometer, 0.0)
+                if state is not None and stats.odometer > state:
+                    total += stats.odometer - state
+                self._odometer = (stats.odometer, total)
+                odometer_rows.append(StatisticData(start=start, state=stats.odometer, sum=total))
+        if soc_rows:
+            async_add_external_statistics(self.hass, self.soc_metadata, soc_rows)
+        if odometer_rows:
+            async_add_external_statistics(self.hass, self.odometer_metadata, odometer_rows)
+        if hours:
+            _LOGGER.debug("Imported %d hours of statistics for %s", len(hours), self.soc_metadata["name"])
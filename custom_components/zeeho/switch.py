@@ -1,8 +1,11 @@
 import logging
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import DOMAIN, ATTR_HEADLOCKSTATE, CONF_SECRET, CONF_Appid, CONF_Authorization, CONF_User_agent
 from .api import ZeehoVehicleUnlockClient
+from .breaker import CircuitBreaker
+from .commands import UnlockCommandQueue
 from . import get_device_info
 
 _LOGGER = logging.getLogger(__name__)
@@ -18,13 +21,17 @@ class ZeehoLockSwitch(CoordinatorEntity, SwitchEntity):
 
     def __init__(self, coordinator, config_entry):
         """Initialize the switch."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, frozenset({"headLockState"}))
         self.config_entry = config_entry
         self.vehicle_unlock_client = ZeehoVehicleUnlockClient(
+            async_get_clientsession(coordinator.hass),
             self.config_entry.data[CONF_Authorization],
             self.config_entry.data[CONF_Appid],
-            self.config_entry.data[CONF_User_agent]
+            self.config_entry.data[CONF_User_agent],
+            # Its own breaker: a failed unlock says nothing about vehicleHomePage, so it must not pause polling
+            breaker=CircuitBreaker(f"{config_entry.title} unlock"),
         )
+        self._commands = UnlockCommandQueue(coordinator, self.vehicle_unlock_client)
         self._attr_name = "Lock"
         self._attr_unique_id = f"{DOMAIN}_lock_{self.config_entry.unique_id}"
         self._attr_device_info = get_device_info(coordinator)
@@ -34,13 +41,18 @@ class ZeehoLockSwitch(CoordinatorEntity, SwitchEntity):
         return self.coordinator.data["headLockState"] == "Locked"
 
     async def async_turn_on(self, **kwargs):
-        secret = self.config_entry.data.get(CONF_SECRET)
+        # Read on every call so a secret changed in the options applies without a reload
+        secret = self.config_entry.options.get(CONF_SECRET) or self.config_entry.data.get(CONF_SECRET)
         if secret:
-            await self.hass.async_add_executor_job(self.vehicle_unlock_client.unlock_vehicle, secret)
-            await self.coordinator.async_request_refresh()
+            # Shows unlocked at once; duplicate requests are collapsed and a short follow-up poll confirms
+            await self._commands.async_unlock(secret)
         else:
             _LOGGER.error("Secret key is missing. Unable to unlock the vehicle.")
 
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        self._commands.async_cancel()
+
     async def async_turn_off(self, **kwargs):
         _LOGGER.warning("Locking the vehicle is not supported.")
 
@@ -0,0 +1,173 @@
+"""Streaming trip segmentation from vehicle snapshots."""
+from typing import NamedTuple, Optional
+
+from .utils import haversine
+
+IDLE_TIMEOUT = 600  # Seconds without progress that end a trip still reported as riding
+MIN_TRIP_DISTANCE = 0.1  # Kilometres; shorter trips raise no events
+MIN_STEP = 0.02  # Kilometres of GPS movement that count as progress
+MAX_SPEED = 200  # km/h; GPS jumps faster than this are left out of the path
+
+class Trip(NamedTuple):
+    start: float  # Epoch seconds
+    end: float
+    distance: float  # Kilometres
+    soc_used: int  # Battery percentage points
+
+    @property
+    def duration(self) -> float:
+        return max(self.end - self.start, 0.0)
+
+    @property
+    def average_speed(self) -> Optional[float]:
+        """km/h"""
+        return self.distance / (self.duration / 3600) if self.duration else None
+
+    @property
+    def soc_per_km(self) -> Optional[float]:
+        return self.soc_used / self.distance if self.distance else None
+
+    def as_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "distance": round(self.distance, 3),
+            "duration": round(self.duration),
+            "average_speed": _round(self.average_speed),
+            "soc_used": self.soc_used,
+            "soc_per_km": _round(self.soc_per_km),
+        }
+
+class TripDetector:
+    """Turn a vehicle's snapshots into trips, one snapshot at a time.
+
+    A trip opens when the vehicle reports riding or its odometer moves, and
+    closes when it stops riding or makes no progress for ``idle_timeout``
+    seconds. Only the open trip's running totals and the previous sample are
+    kept, so memory stays constant however long the vehicle is tracked.
+    Distance is the odometer delta, or the GPS path while the odometer has
+    not moved yet. SOC used sums the drops between samples. A trip that
+    started and ended between two polls is still caught by its odometer
+    jump.
+    """
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT, min_distance: float = MIN_TRIP_DISTANCE):
+        self.idle_timeout = idle_timeout
+        self.min_distance = min_distance
+        self.last_trip: Optional[Trip] = None
+        self.trip_count = 0
+        self._last = None  # (timestamp, odometer, soc, lng, lat) of the previous sample
+        self._active = False
+        self._announced = False  # Start event sent
+        self._start = None
+        self._start_odometer = None
+        self._path = 0.0
+        self._soc_used = 0
+        self._progress = None  # Time of the last odometer or position change
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    @property
+    def current(self) -> Optional[Trip]:
+        """The open trip so far, or None."""
+        if not self._active or self._last is None:
+            return None
+        return Trip(self._start, self._progress, self._distance(self._last[1]), self._soc_used)
+
+    def update(self, timestamp: float, riding: bool, odometer: Optional[float], soc: Optional[int],
+               lng: Optional[float], lat: Optional[float]) -> list:
+        """Feed one snapshot; return ``(event, data)`` pairs for trips that started or ended."""
+        events = []
+        last = self._last
+        self._last = (timestamp, odometer, soc, lng, lat)
+        if last is None:
+            if riding:
+                self._open(timestamp, odometer)
+            return events
+        last_time, last_odometer, last_soc, last_lng, last_lat = last
+        odometer_moved = odometer is not None and last_odometer is not None and odometer > last_odometer
+
+        if not self._active:
+            if odometer_moved:
+                # Set off since the previous poll: that poll is the start
+                self._open(last_time, last_odometer)
+            elif riding:
+                self._open(timestamp, odometer)
+                return events
+            else:
+                return events
+
+        step = _step(last_lng, last_lat, lng, lat, timestamp - last_time)
+        if odometer_moved or step >= MIN_STEP:
+            self._path += step
+            self._progress = timestamp
+        if soc is not None and last_soc is not None and soc < last_soc:
+            self._soc_used += last_soc - soc
+
+        distance = self._distance(odometer)
+        if not self._announced and distance >= self.min_distance:
+            self._announced = True
+            events.append(("start", {"start": self._start}))
+
+        if not riding or timestamp - self._progress >= self.idle_timeout:
+            trip = Trip(self._start, self._progress, distance, self._soc_used)
+            if self._announced:
+                self.last_trip = trip
+                self.trip_count += 1
+                events.append(("end", trip.as_dict()))
+            self._active = False
+        return events
+
+    def as_dict(self) -> dict:
+        """State for persisting across restarts."""
+        return {
+            "last": list(self._last) if self._last is not None else None,
+            "last_trip": list(self.last_trip) if self.last_trip is not None else None,
+            "trip_count": self.trip_count,
+            "open": [self._start, self._start_odometer, self._path, self._soc_used, self._progress,
+                     self._announced] if self._active else None,
+        }
+
+    def restore(self, state: dict) -> None:
+        """Resume from ``as_dict`` output; malformed state is ignored."""
+        try:
+            last = tuple(state["last"]) if state.get("last") else None
+            last_trip = Trip(*state["last_trip"]) if state.get("last_trip") else None
+            trip_count = int(state.get("trip_count", 0))
+            start, start_odometer, path, soc_used, progress, announced = state.get("open") or (None,) * 6
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return
+        self._last = last
+        self.last_trip = last_trip
+        self.trip_count = trip_count
+        self._active = start is not None
+        if self._active:
+            self._start, self._start_odometer, self._progress = start, start_odometer, progress
+            self._path, self._soc_used, self._announced = path, soc_used, announced
+
+    def _open(self, timestamp, odometer) -> None:
+        self._active = True
+        self._announced = False
+        self._start = self._progress = timestamp
+        self._start_odometer = odometer
+        self._path = 0.0
+        self._soc_used = 0
+
+    def _distance(self, odometer) -> float:
+        if odometer is not None and self._start_odometer is not None and odometer > self._start_odometer:
+            return round(odometer - self._start_odometer, 3)  # Odometer has 0.1 km steps
+        return self._path
+
+def _step(lng1, lat1, lng2, lat2, seconds) -> float:
+    """GPS distance in km between two samples, 0 if unknown or implausibly fast."""
+    if None in (lng1, lat1, lng2, lat2):
+        return 0.0
+    distance = haversine(lng1, lat1, lng2, lat2) / 1000
+    if seconds > 0 and distance / (seconds / 3600) > MAX_SPEED:
+        return 0.0
+    return distance
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 """Mars coordinates transform"""
+import functools
 import math
+import struct
 import time
-from typing import List, Optional, Tuple
+from array import array
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy ships with Home Assistant
+    np = None
 
 # Constants
 PI = math.pi
@@ -125,6 +133,334 @@ def out_of_china(lng: float, lat: float) -> bool:
     """Determines whether the coordinates are outside of China."""
     return not (72.004 <= lng <= 137.8347 and 0.8293 <= lat <= 55.8271)
 
+# Exact GCJ02 -> WGS84 inverse
+#
+# ``gcj02towgs84`` above is the classic one-step approximation and can be off
+# by a metre or more. ``gcj02towgs84_exact`` solves ``wgs84togcj02(w) == g``
+# by fixed-point iteration. The GCJ02 offset changes slowly with position, so
+# each step shrinks the error by roughly three orders of magnitude. Adding the
+# interpolated residual from a ``CorrectionGrid`` to the one-step estimate
+# leaves one or two refinement steps in the common case.
+
+CHINA_BOUNDS = (72.004, 0.8293, 137.8347, 55.8271)  # min_lng, min_lat, max_lng, max_lat
+
+class CorrectionGrid:
+    """Residuals of the one-step GCJ02 -> WGS84 estimate on a regular grid.
+
+    Each node holds ``exact - gcj02towgs84`` at a GCJ02 node position, stored
+    as float32 degrees and looked up with bilinear interpolation. The default
+    0.25 degree grid is about 470 KB on disk.
+    """
+
+    MAGIC = b"ZGCJ"
+    VERSION = 1
+    HEADER = struct.Struct("<4sB3xdddII")  # magic, version, lng0, lat0, step, cols, rows
+
+    def __init__(self, lng0: float, lat0: float, step: float, cols: int, rows: int,
+                 dlng: array, dlat: array):
+        if len(dlng) != cols * rows or len(dlat) != cols * rows:
+            raise ValueError("Grid data does not match its dimensions")
+        self.lng0 = lng0
+        self.lat0 = lat0
+        self.step = step
+        self.cols = cols
+        self.rows = rows
+        self.dlng = dlng
+        self.dlat = dlat
+
+    @classmethod
+    def build(cls, step: float = 0.25, iterations: int = 4) -> "CorrectionGrid":
+        """Solves the exact inverse at every node of the China bounding box."""
+        min_lng, min_lat, max_lng, max_lat = CHINA_BOUNDS
+        cols = int(math.ceil((max_lng - min_lng) / step)) + 1
+        rows = int(math.ceil((max_lat - min_lat) / step)) + 1
+        lngs = [min_lng + (i % cols) * step for i in range(cols * rows)]
+        lats = [min_lat + (i // cols) * step for i in range(cols * rows)]
+        approx_lngs, approx_lats = gcj02towgs84_batch(lngs, lats)
+        wgs_lngs, wgs_lats = approx_lngs, approx_lats
+        for _ in range(iterations):
+            gcj_lngs, gcj_lats = wgs84togcj02_batch(wgs_lngs, wgs_lats)
+            wgs_lngs = [w - (g - t) for w, g, t in zip(wgs_lngs, gcj_lngs, lngs)]
+            wgs_lats = [w - (g - t) for w, g, t in zip(wgs_lats, gcj_lats, lats)]
+        dlng = array("f", (w - a for w, a in zip(wgs_lngs, approx_lngs)))
+        dlat = array("f", (w - a for w, a in zip(wgs_lats, approx_lats)))
+        return cls(min_lng, min_lat, step, cols, rows, dlng, dlat)
+
+    @classmethod
+    def load(cls, path: str) -> "CorrectionGrid":
+        """Reads a grid written by ``save``."""
+        with open(path, "rb") as file:
+            header = file.read(cls.HEADER.size)
+            magic, version, lng0, lat0, step, cols, rows = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f"Not a correction grid file: {path}")
+            dlng = array("f")
+            dlat = array("f")
+            dlng.fromfile(file, cols * rows)
+            dlat.fromfile(file, cols * rows)
+        return cls(lng0, lat0, step, cols, rows, dlng, dlat)
+
+    def save(self, path: str) -> None:
+        """Writes the grid as a little-endian header followed by two float32 planes."""
+        with open(path, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.lng0, self.lat0,
+                                        self.step, self.cols, self.rows))
+            self.dlng.tofile(file)
+            self.dlat.tofile(file)
+
+    def offset(self, lng: float, lat: float) -> Optional[Tuple[float, float]]:
+        """Returns the interpolated residual (dlng, dlat) at a GCJ02 point, or None outside the grid."""
+        x = (lng - self.lng0) / self.step
+        y = (lat - self.lat0) / self.step
+        if not (0 <= x <= self.cols - 1 and 0 <= y <= self.rows - 1):
+            return None
+        col = min(int(x), self.cols - 2)
+        row = min(int(y), self.rows - 2)
+        fx = x - col
+        fy = y - row
+        i = row * self.cols + col
+        j = i + self.cols
+        w00 = (1 - fx) * (1 - fy)
+        w10 = fx * (1 - fy)
+        w01 = (1 - fx) * fy
+        w11 = fx * fy
+        dlng, dlat = self.dlng, self.dlat
+        return (
+            dlng[i] * w00 + dlng[i + 1] * w10 + dlng[j] * w01 + dlng[j + 1] * w11,
+            dlat[i] * w00 + dlat[i + 1] * w10 + dlat[j] * w01 + dlat[j + 1] * w11,
+        )
+
+_correction_grid: Optional[CorrectionGrid] = None
+
+def set_correction_grid(grid: Optional[CorrectionGrid]) -> None:
+    """Installs the grid used to seed ``gcj02towgs84_exact`` (None to disable)."""
+    global _correction_grid
+    _correction_grid = grid
+
+def get_correction_grid() -> Optional[CorrectionGrid]:
+    """Returns the installed correction grid, if any."""
+    return _correction_grid
+
+def gcj02towgs84_exact(lng: float, lat: float, tolerance: float = 1e-8,
+                       max_iterations: int = 10) -> List[float]:
+    """
+    Converts GCJ02 (Mars coordinates) to WGS84 by fixed-point iteration.
+
+    :param lng: Longitude in GCJ02
+    :param lat: Latitude in GCJ02
+    :param tolerance: Convergence tolerance in degrees (1e-8 is about 1 mm)
+    :param max_iterations: Upper bound on refinement steps
+    :return: [converted_longitude, converted_latitude]
+    """
+    if out_of_china(lng, lat):
+        return [lng, lat]
+    wgs_lng, wgs_lat = gcj02towgs84(lng, lat)
+    residual = _correction_grid.offset(lng, lat) if _correction_grid is not None else None
+    if residual is not None:
+        wgs_lng += residual[0]
+        wgs_lat += residual[1]
+
+    for _ in range(max_iterations):
+        gcj_lng, gcj_lat = wgs84togcj02(wgs_lng, wgs_lat)
+        err_lng = gcj_lng - lng
+        err_lat = gcj_lat - lat
+        wgs_lng -= err_lng
+        wgs_lat -= err_lat
+        if abs(err_lng) < tolerance and abs(err_lat) < tolerance:
+            break
+    return [wgs_lng, wgs_lat]
+
+def bd09_to_wgs84_exact(bd_lon: float, bd_lat: float) -> List[float]:
+    """Converts BD09 to WGS84 using the exact GCJ02 inverse."""
+    lon, lat = bd09_to_gcj02(bd_lon, bd_lat)
+    return gcj02towgs84_exact(lon, lat)
+
+# Batch conversions
+#
+# Each *_batch function takes two equally long sequences (or NumPy arrays) of
+# longitudes and latitudes and returns a ``(lngs, lats)`` tuple. With NumPy
+# the whole batch is converted in one vectorized pass and arrays are
+# returned; without it the scalar functions above are applied per point and
+# lists are returned.
+
+def out_of_china_mask(lngs: Sequence[float], lats: Sequence[float]):
+    """Element-wise ``out_of_china``."""
+    if np is None:
+        return [out_of_china(lng, lat) for lng, lat in zip(lngs, lats)]
+    lngs, lats = _as_arrays(lngs, lats)
+    return ~((lngs >= 72.004) & (lngs <= 137.8347) & (lats >= 0.8293) & (lats <= 55.8271))
+
+def wgs84togcj02_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts WGS84 to GCJ02 for a batch of points."""
+    if np is None:
+        return _map_pairs(wgs84togcj02, lngs, lats)
+    lngs, lats = _as_arrays(lngs, lats)
+    dlng, dlat = _gcj02_offsets(lngs, lats)
+    return lngs + dlng, lats + dlat
+
+def gcj02towgs84_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts GCJ02 to WGS84 for a batch of points."""
+    if np is None:
+        return _map_pairs(gcj02towgs84, lngs, lats)
+    lngs, lats = _as_arrays(lngs, lats)
+    dlng, dlat = _gcj02_offsets(lngs, lats)
+    return lngs - dlng, lats - dlat
+
+def gcj02_to_bd09_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts GCJ02 to BD09 for a batch of points."""
+    if np is None:
+        return _map_pairs(gcj02_to_bd09, lngs, lats)
+    lngs, lats = _as_arrays(lngs, lats)
+    z = np.sqrt(lngs ** 2 + lats ** 2) + 0.00002 * np.sin(lats * PI)
+    theta = np.arctan2(lats, lngs) + 0.000003 * np.cos(lngs * PI)
+    return z * np.cos(theta) + 0.0065, z * np.sin(theta) + 0.006
+
+def bd09_to_gcj02_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts BD09 to GCJ02 for a batch of points."""
+    if np is None:
+        return _map_pairs(bd09_to_gcj02, lngs, lats)
+    lngs, lats = _as_arrays(lngs, lats)
+    x = lngs - 0.0065
+    y = lats - 0.006
+    z = np.sqrt(x ** 2 + y ** 2) - 0.00002 * np.sin(y * PI)
+    theta = np.arctan2(y, x) - 0.000003 * np.cos(x * PI)
+    return z * np.cos(theta), z * np.sin(theta)
+
+def bd09_to_wgs84_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts BD09 to WGS84 for a batch of points."""
+    return gcj02towgs84_batch(*bd09_to_gcj02_batch(lngs, lats))
+
+def wgs84_to_bd09_batch(lngs: Sequence[float], lats: Sequence[float]) -> Tuple:
+    """Converts WGS84 to BD09 for a batch of points."""
+    return gcj02_to_bd09_batch(*wgs84togcj02_batch(lngs, lats))
+
+def _as_arrays(lngs, lats):
+    """Returns float64 arrays, rejecting mismatched lengths."""
+    lngs = np.asarray(lngs, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    if lngs.shape != lats.shape:
+        raise ValueError("Longitude and latitude batches must have the same shape")
+    return lngs, lats
+
+def _map_pairs(func, lngs, lats) -> Tuple[List[float], List[float]]:
+    """Pure-Python fallback: applies a scalar conversion to every point."""
+    if len(lngs) != len(lats):
+        raise ValueError("Longitude and latitude batches must have the same length")
+    out_lngs, out_lats = [], []
+    for lng, lat in zip(lngs, lats):
+        lng, lat = func(lng, lat)
+        out_lngs.append(lng)
+        out_lats.append(lat)
+    return out_lngs, out_lats
+
+def _gcj02_offsets(lngs, lats):
+    """Vectorized GCJ02 offsets (dlng, dlat) in degrees, zero outside China."""
+    x = lngs - 105.0
+    y = lats - 35.0
+    sqrt_abs_x = np.sqrt(np.abs(x))
+    common = (20.0 * np.sin(6.0 * x * PI) + 20.0 * np.sin(2.0 * x * PI)) * 2.0 / 3.0
+
+    dlat = -100.0 + 2.0 * x + 3.0 * y + 0.2 * y ** 2 + 0.1 * x * y + 0.2 * sqrt_abs_x + common
+    dlat += (20.0 * np.sin(y * PI) + 40.0 * np.sin(y / 3.0 * PI)) * 2.0 / 3.0
+    dlat += (160.0 * np.sin(y / 12.0 * PI) + 320 * np.sin(y * PI / 30.0)) * 2.0 / 3.0
+
+    dlng = 300.0 + x + 2.0 * y + 0.1 * x ** 2 + 0.1 * x * y + 0.1 * sqrt_abs_x + common
+    dlng += (20.0 * np.sin(x * PI) + 40.0 * np.sin(x / 3.0 * PI)) * 2.0 / 3.0
+    dlng += (150.0 * np.sin(x / 12.0 * PI) + 300.0 * np.sin(x / 30.0 * PI)) * 2.0 / 3.0
+
+    radlat = lats * (PI / 180.0)
+    magic = 1 - EE * np.sin(radlat) ** 2
+    sqrtmagic = np.sqrt(magic)
+    dlat = (dlat * 180.0) / ((A * (1 - EE)) / (magic * sqrtmagic) * PI)
+    dlng = (dlng * 180.0) / (A / sqrtmagic * np.cos(radlat) * PI)
+
+    outside = out_of_china_mask(lngs, lats)
+    return np.where(outside, 0.0, dlng), np.where(outside, 0.0, dlat)
+
+# Datums and distances
+#
+# Positions from the ZEEHO API are GCJ02. ``to_gcj02`` brings coordinates in
+# any supported datum into that frame so they can be compared directly. The
+# distance helpers work in metres; ``local_xy`` projects onto a plane tangent
+# at an origin, which is accurate to well under a metre across a few
+# kilometres and is what geofence and track geometry use.
+
+EARTH_RADIUS = 6371008.8  # Mean radius in metres
+DATUM_WGS84 = "wgs84"
+DATUM_GCJ02 = "gcj02"
+DATUM_BD09 = "bd09"
+DATUMS = (DATUM_WGS84, DATUM_GCJ02, DATUM_BD09)
+
+def to_gcj02(lng: float, lat: float, datum: str) -> List[float]:
+    """Converts a point given in ``datum`` (wgs84, gcj02 or bd09) to GCJ02."""
+    if datum == DATUM_GCJ02:
+        return [lng, lat]
+    if datum == DATUM_WGS84:
+        return wgs84togcj02(lng, lat)
+    if datum == DATUM_BD09:
+        return bd09_to_gcj02(lng, lat)
+    raise ValueError(f"Unknown datum: {datum}")
+
+def haversine(lng1: float, lat1: float, lng2: float, lat2: float) -> float:
+    """Great-circle distance in metres between two points in the same datum."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
+def local_xy(lng: float, lat: float, origin_lng: float, origin_lat: float) -> Tuple[float, float]:
+    """Projects a point to (east, north) metres relative to an origin (equirectangular)."""
+    x = math.radians(lng - origin_lng) * EARTH_RADIUS * math.cos(math.radians(origin_lat))
+    y = math.radians(lat - origin_lat) * EARTH_RADIUS
+    return x, y
+
+def segment_distance(lng: float, lat: float, lng1: float, lat1: float, lng2: float, lat2: float) -> float:
+    """Distance in metres from a point to the segment between two points."""
+    x1, y1 = local_xy(lng1, lat1, lng, lat)
+    x2, y2 = local_xy(lng2, lat2, lng, lat)
+    dx = x2 - x1
+    dy = y2 - y1
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length))
+    return math.hypot(x1 + t * dx, y1 + t * dy)
+
+def metres_to_degrees(metres: float, lat: float) -> Tuple[float, float]:
+    """Returns the (longitude, latitude) span in degrees of ``metres`` at a latitude."""
+    dlat = math.degrees(metres / EARTH_RADIUS)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return dlng, dlat
+
+# Memoized views of one position
+#
+# Entities show a position in WGS84 (the tracker), GCJ02 (Gaode) and BD09
+# (Baidu). ``gcj02_views`` derives all three from the GCJ02 position the API
+# reports. Results are cached on the point quantized to ``VIEW_PRECISION``
+# decimals, finer than the API reports, so a parked vehicle reuses the
+# previous result instead of redoing the iterative inverse.
+
+VIEW_PRECISION = 6  # Decimal places of the cache key, about 0.1 m
+VIEW_CACHE_SIZE = 256
+
+class CoordinateViews(NamedTuple):
+    wgs_lng: float
+    wgs_lat: float
+    gcj_lng: float
+    gcj_lat: float
+    bd_lng: float
+    bd_lat: float
+
+def gcj02_views(lng: float, lat: float) -> CoordinateViews:
+    """Returns a GCJ02 point in every datum, rounded to ``VIEW_PRECISION`` decimals."""
+    return _gcj02_views(round(lng, VIEW_PRECISION), round(lat, VIEW_PRECISION))
+
+@functools.lru_cache(maxsize=VIEW_CACHE_SIZE)
+def _gcj02_views(lng: float, lat: float) -> CoordinateViews:
+    wgs_lng, wgs_lat = gcj02towgs84_exact(lng, lat)
+    bd_lng, bd_lat = gcj02_to_bd09(lng, lat)
+    return CoordinateViews(*(round(value, VIEW_PRECISION) for value in (wgs_lng, wgs_lat, lng, lat, bd_lng, bd_lat)))
+
 # Example usage
 if __name__ == '__main__':
     lng = 121.532
@@ -0,0 +1,62 @@
+"""Parked-position filter in the vehicle coordinator pipeline."""
+import asyncio
+import copy
+import datetime
+import json
+import logging
+import tempfile
+
+from homeassistant.core import HomeAssistant
+
+from benchmarks.stub_server import PAYLOAD_PATH
+from custom_components.zeeho import ZeehoAccountCoordinator, ZeehoDataUpdateCoordinator
+from custom_components.zeeho.api import ZeehoVehicleHomePageClient
+from custom_components.zeeho.utils import haversine
+
+_LOGGER = logging.getLogger(__name__)
+
+def _payload(latitude, longitude):
+    with open(PAYLOAD_PATH, encoding="utf-8") as file:
+        vehicle = copy.deepcopy(json.load(file)["data"][0])
+    vehicle["rideState"] = "离线"
+    vehicle["location"]["latitude"] = f"{latitude:.6f}"
+    vehicle["location"]["longitude"] = f"{longitude:.6f}"
+    return [vehicle]
+
+async def _async_run(steps):
+    """Feed vehicle lists to a coordinator; return the published (lng, lat) after each."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        client = ZeehoVehicleHomePageClient(None, "Bearer test", "sign", "app", "nonce", "signature", "okhttp/4.9.2")
+        account = ZeehoAccountCoordinator(hass, _LOGGER, ("test", 1), client)
+        interval = datetime.timedelta(seconds=90)
+        vehicle = ZeehoDataUpdateCoordinator(hass, _LOGGER, account, 0, "test", interval, interval, interval)
+        published = []
+        for vehicles in steps:
+            snapshot = vehicle._process_account_data(vehicles)
+            vehicle.data = snapshot
+            published.append((snapshot.longitude, snapshot.latitude))
+        await hass.async_stop(force=True)
+    return published
+
+def test_parked_jitter_is_held():
+    published = asyncio.run(_async_run([
+        _payload(30.274085, 120.155070),
+        _payload(30.274120, 120.155100),  # About 5 m off
+        _payload(30.274050, 120.155040),
+    ]))
+    assert published[1] == published[0]
+    assert published[2] == published[0]
+
+def test_moved_parked_vehicle_converges_on_repeated_payload():
+    moved = _payload(30.283085, 120.155070)  # About 1 km north
+    published = asyncio.run(_async_run([
+        _payload(30.274085, 120.155070),
+        _payload(30.274120, 120.155100),  # Jitter fills the median window
+        _payload(30.274050, 120.155040),
+        moved,
+        moved,  # The same list again takes the unchanged-payload path
+        moved,
+        moved,
+    ]))
+    assert haversine(*published[-1], 120.155070, 30.283085) < 1
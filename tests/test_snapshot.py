@@ -0,0 +1,53 @@
+"""Snapshot persistence across entry unload and removal."""
+import asyncio
+import datetime
+import logging
+import os
+import tempfile
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from custom_components.zeeho import (
+    SNAPSHOT_STORAGE_VERSION,
+    ZeehoAccountCoordinator,
+    ZeehoDataUpdateCoordinator,
+    _snapshot_key,
+    async_remove_entry,
+    async_unload_entry,
+)
+from custom_components.zeeho.api import ZeehoVehicleHomePageClient
+from custom_components.zeeho.const import COORDINATOR, DOMAIN
+from tests.test_position import _payload
+
+_LOGGER = logging.getLogger(__name__)
+
+async def _async_remove_with_pending_save(delay):
+    """Unload and remove an entry with a delayed snapshot write pending; return whether the file exists after it."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        entry = config_entries.ConfigEntry(
+            version=1, minor_version=1, domain=DOMAIN, title="test", data={}, source="user", options={},
+        )
+        client = ZeehoVehicleHomePageClient(None, "Bearer test", "sign", "app", "nonce", "signature", "okhttp/4.9.2")
+        account = ZeehoAccountCoordinator(hass, _LOGGER, ("test", 1), client)
+        interval = datetime.timedelta(seconds=90)
+        vehicle = ZeehoDataUpdateCoordinator(hass, _LOGGER, account, 0, "test", interval, interval, interval)
+        vehicle.snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, _snapshot_key(entry))
+        account.async_register(vehicle)
+        hass.data[DOMAIN] = {entry.entry_id: {COORDINATOR: vehicle}}
+
+        vehicle.data = vehicle._process_account_data(_payload(30.274085, 120.155070))
+        vehicle.snapshot_store.async_delay_save(vehicle._snapshot_to_save, delay)
+        assert await async_unload_entry(hass, entry)
+        await async_remove_entry(hass, entry)
+        await asyncio.sleep(delay * 3)
+        await hass.async_block_till_done()
+        exists = os.path.exists(os.path.join(config_dir, STORAGE_DIR, _snapshot_key(entry)))
+        await hass.async_stop(force=True)
+    return exists
+
+def test_removed_entry_snapshot_stays_gone():
+    assert not asyncio.run(_async_remove_with_pending_save(0.1))